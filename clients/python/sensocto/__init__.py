@@ -21,6 +21,11 @@ Example:
     ...     await sensor.send_measurement("celsius", {"value": 23.5})
     ...
     >>> asyncio.run(main())
+
+uvloop is the supported event loop. Install it with ``pip install sensocto[speedups]``
+and start your program with ``sensocto.run(main())``, which uses uvloop when it is
+available and falls back to asyncio otherwise. To keep using asyncio.run(), call
+``sensocto.install_fast_loop()`` first or set ``SENSOCTO_UVLOOP=1``.
 """
 
 from sensocto.call import CallSession
@@ -34,6 +39,7 @@ from sensocto.errors import (
     SensoctoError,
     TimeoutError,
 )
+from sensocto.loop import install_fast_loop, run
 from sensocto.models import (
     AttentionLevel,
     BackpressureConfig,
@@ -41,6 +47,7 @@ from sensocto.models import (
     CallParticipant,
     ConnectionState,
     Measurement,
+    ParticipantColumns,
     Room,
     RoomRole,
     SensorEvent,
@@ -61,6 +68,9 @@ __all__ = [
     # Streams and sessions
     "SensorStream",
     "CallSession",
+    # Event loop
+    "run",
+    "install_fast_loop",
     # Models
     "AttentionLevel",
     "BackpressureConfig",
@@ -68,6 +78,7 @@ __all__ = [
     "CallParticipant",
     "ConnectionState",
     "Measurement",
+    "ParticipantColumns",
     "Room",
     "RoomRole",
     "SensorEvent",
@@ -1,7 +1,7 @@
 """Call session implementation."""
 
 import logging
-from typing import Any, Callable, Dict, List, Optional
+from typing import Any, Callable, Dict, List, Optional, Tuple, Type, Union
 
 from sensocto.errors import SensoctoError
 from sensocto.models import (
@@ -10,6 +10,7 @@ from sensocto.models import (
     CallParticipant,
     MediaEventReceived,
     ParticipantAudioChangedEvent,
+    ParticipantColumns,
     ParticipantJoinedEvent,
     ParticipantLeftEvent,
     ParticipantVideoChangedEvent,
@@ -19,10 +20,26 @@ from sensocto.socket import PhoenixSocket
 
 logger = logging.getLogger(__name__)
 
+ToggleEventType = Type[Union[ParticipantAudioChangedEvent, ParticipantVideoChangedEvent]]
+
 
 class CallSession:
     """Session for video/voice communication."""
 
+    __slots__ = (
+        "_socket",
+        "_topic",
+        "_room_id",
+        "_user_id",
+        "_ice_servers",
+        "_joined",
+        "_in_call",
+        "_endpoint_id",
+        "_event_handlers",
+        "_toggle_events",
+        "__weakref__",
+    )
+
     def __init__(
         self,
         socket: PhoenixSocket,
@@ -50,6 +67,7 @@ class CallSession:
         self._in_call = False
         self._endpoint_id: Optional[str] = None
         self._event_handlers: List[Callable[[CallEvent], None]] = []
+        self._toggle_events: Dict[Tuple[ToggleEventType, str, bool], CallEvent] = {}
 
         # Register event handlers
         self._setup_event_handlers()
@@ -83,6 +101,9 @@ class CallSession:
         """
         Registers an event handler.
 
+        Events are immutable and may be shared between dispatches; for example
+        repeated audio/video toggles for a participant reuse the same instance.
+
         Args:
             handler: Callback function called when events are received.
         """
@@ -105,7 +126,7 @@ class CallSession:
             # Extract ICE servers from response
             if "ice_servers" in reply.response:
                 self._ice_servers = reply.response["ice_servers"]
-            logger.info(f"Joined call channel: {self._topic}")
+            logger.info("Joined call channel: %s", self._topic)
             return reply.response
         else:
             raise SensoctoError(f"Failed to join channel: {reply.response}")
@@ -120,7 +141,7 @@ class CallSession:
 
         await self._socket.send(self._topic, "phx_leave", {})
         self._joined = False
-        logger.info(f"Left call channel: {self._topic}")
+        logger.info("Left call channel: %s", self._topic)
 
     async def join_call(self) -> Dict[str, Any]:
         """
@@ -137,7 +158,7 @@ class CallSession:
         if reply.is_ok:
             self._in_call = True
             self._endpoint_id = reply.response.get("endpoint_id")
-            logger.info(f"Joined call with endpoint: {self._endpoint_id}")
+            logger.info("Joined call with endpoint: %s", self._endpoint_id)
             return reply.response
         else:
             raise SensoctoError(f"Failed to join call: {reply.response}")
@@ -156,13 +177,32 @@ class CallSession:
         """
         Sends a media event (SDP offer/answer, ICE candidate).
 
+        Waits until the event has been written to the socket. Use
+        send_media_event_nowait() for bursts such as ICE trickling.
+
+        Args:
+            data: The media event data.
+        """
+        self.send_media_event_nowait(data)
+        await self._socket.flush()
+
+    def send_media_event_nowait(self, data: Any) -> None:
+        """
+        Queues a media event without waiting for it to be written.
+
+        Call flush() afterwards when delivery to the socket must be confirmed.
+
         Args:
             data: The media event data.
         """
         if not self._in_call:
             raise SensoctoError("Not in call")
 
-        await self._socket.send_no_reply(self._topic, "media_event", {"data": data})
+        self._socket.send_nowait(self._topic, "media_event", {"data": data})
+
+    async def flush(self) -> None:
+        """Waits until all queued events have been written to the socket."""
+        await self._socket.flush()
 
     async def toggle_audio(self, enabled: bool) -> None:
         """
@@ -210,88 +250,136 @@ class CallSession:
         reply = await self._socket.send(self._topic, "get_participants", {})
 
         if reply.is_ok:
-            participants = {}
-            for user_id, data in reply.response.get("participants", {}).items():
-                participants[user_id] = CallParticipant(
-                    user_id=data.get("user_id", user_id),
-                    endpoint_id=data.get("endpoint_id", ""),
-                    user_info=data.get("user_info", {}),
-                    joined_at=data.get("joined_at"),
-                    audio_enabled=data.get("audio_enabled", False),
-                    video_enabled=data.get("video_enabled", False),
-                )
-            return participants
+            return {
+                user_id: CallParticipant.from_payload(data, user_id)
+                for user_id, data in reply.response.get("participants", {}).items()
+            }
 
         return {}
 
+    async def get_participant_columns(self) -> ParticipantColumns:
+        """
+        Gets the current participants as parallel lists.
+
+        Returns:
+            A ParticipantColumns with one entry per participant.
+        """
+        reply = await self._socket.send(self._topic, "get_participants", {})
+
+        columns = ParticipantColumns()
+        if reply.is_ok:
+            for user_id, data in reply.response.get("participants", {}).items():
+                columns.user_ids.append(data.get("user_id", user_id))
+                columns.endpoint_ids.append(data.get("endpoint_id", ""))
+                columns.audio_enabled.append(data.get("audio_enabled", False))
+                columns.video_enabled.append(data.get("video_enabled", False))
+
+        return columns
+
     def _setup_event_handlers(self) -> None:
         """Sets up event handlers for call events."""
-        self._socket.on(self._topic, "participant_joined", self._on_participant_joined)
-        self._socket.on(self._topic, "participant_left", self._on_participant_left)
-        self._socket.on(self._topic, "media_event", self._on_media_event)
-        self._socket.on(self._topic, "participant_audio_changed", self._on_audio_changed)
-        self._socket.on(self._topic, "participant_video_changed", self._on_video_changed)
-        self._socket.on(self._topic, "quality_changed", self._on_quality_changed)
-        self._socket.on(self._topic, "call_ended", self._on_call_ended)
+        self._socket.register_topic(
+            self._topic,
+            {
+                "participant_joined": self._on_participant_joined,
+                "participant_left": self._on_participant_left,
+                "media_event": self._on_media_event,
+                "participant_audio_changed": self._on_audio_changed,
+                "participant_video_changed": self._on_video_changed,
+                "quality_changed": self._on_quality_changed,
+                "call_ended": self._on_call_ended,
+            },
+        )
 
     def _dispatch_event(self, event: CallEvent) -> None:
         """Dispatches an event to all handlers."""
-        for handler in self._event_handlers:
+        handlers = self._event_handlers
+        if not handlers:
+            return
+
+        for handler in handlers:
             try:
                 handler(event)
             except Exception as e:
-                logger.error(f"Error in event handler: {e}")
+                logger.error("Error in event handler: %s", e)
 
     def _on_participant_joined(self, payload: Dict[str, Any]) -> None:
         """Handles participant joined event."""
-        participant = CallParticipant(
-            user_id=payload.get("user_id", ""),
-            endpoint_id=payload.get("endpoint_id", ""),
-            user_info=payload.get("user_info", {}),
-            joined_at=payload.get("joined_at"),
-            audio_enabled=payload.get("audio_enabled", False),
-            video_enabled=payload.get("video_enabled", False),
-        )
+        if not self._event_handlers:
+            return
+
+        participant = CallParticipant.from_payload(payload)
         self._dispatch_event(ParticipantJoinedEvent(participant=participant))
 
     def _on_participant_left(self, payload: Dict[str, Any]) -> None:
         """Handles participant left event."""
+        user_id = payload.get("user_id", "")
+        for cls in (ParticipantAudioChangedEvent, ParticipantVideoChangedEvent):
+            self._toggle_events.pop((cls, user_id, True), None)
+            self._toggle_events.pop((cls, user_id, False), None)
+
+        if not self._event_handlers:
+            return
+
         self._dispatch_event(
             ParticipantLeftEvent(
-                user_id=payload.get("user_id", ""),
+                user_id=user_id,
                 crashed=payload.get("crashed", False),
             )
         )
 
     def _on_media_event(self, payload: Dict[str, Any]) -> None:
         """Handles media event."""
+        if not self._event_handlers:
+            return
+
         self._dispatch_event(MediaEventReceived(data=payload.get("data")))
 
     def _on_audio_changed(self, payload: Dict[str, Any]) -> None:
         """Handles audio changed event."""
+        if not self._event_handlers:
+            return
+
         self._dispatch_event(
-            ParticipantAudioChangedEvent(
-                user_id=payload.get("user_id", ""),
-                enabled=payload.get("audio_enabled", False),
+            self._toggle_event(
+                ParticipantAudioChangedEvent,
+                payload.get("user_id", ""),
+                payload.get("audio_enabled", False),
             )
         )
 
     def _on_video_changed(self, payload: Dict[str, Any]) -> None:
         """Handles video changed event."""
+        if not self._event_handlers:
+            return
+
         self._dispatch_event(
-            ParticipantVideoChangedEvent(
-                user_id=payload.get("user_id", ""),
-                enabled=payload.get("video_enabled", False),
+            self._toggle_event(
+                ParticipantVideoChangedEvent,
+                payload.get("user_id", ""),
+                payload.get("video_enabled", False),
             )
         )
 
+    def _toggle_event(self, cls: ToggleEventType, user_id: str, enabled: bool) -> CallEvent:
+        """Returns the cached toggle event for a participant, creating it once."""
+        key = (cls, user_id, enabled)
+        event = self._toggle_events.get(key)
+        if event is None:
+            event = self._toggle_events[key] = cls(user_id=user_id, enabled=enabled)
+        return event
+
     def _on_quality_changed(self, payload: Dict[str, Any]) -> None:
         """Handles quality changed event."""
+        if not self._event_handlers:
+            return
+
         self._dispatch_event(QualityChangedEvent(quality=payload.get("quality", "")))
 
     def _on_call_ended(self, payload: Dict[str, Any]) -> None:
         """Handles call ended event."""
         self._in_call = False
+        self._toggle_events.clear()
         self._dispatch_event(CallEndedEvent())
 
     async def close(self) -> None:
@@ -1,7 +1,11 @@
 """Main Sensocto client implementation."""
 
+import asyncio
 import logging
-from typing import Any, Dict, Optional
+from dataclasses import fields
+from typing import Any, Dict, List, Optional, Tuple
+
+import orjson
 
 from sensocto.call import CallSession
 from sensocto.config import SensoctoConfig, SensorConfig
@@ -12,6 +16,9 @@ from sensocto.socket import PhoenixSocket
 
 logger = logging.getLogger(__name__)
 
+# Keyword arguments accepted by SensoctoConfig, computed once at import.
+_CONFIG_FIELDS = frozenset(f.name for f in fields(SensoctoConfig) if f.init)
+
 
 class SensoctoClient:
     """
@@ -28,6 +35,15 @@ class SensoctoClient:
         ...     await sensor.send_measurement("temperature", {"value": 23.5})
     """
 
+    __slots__ = (
+        "_config",
+        "_socket",
+        "_state",
+        "_connector_joined",
+        "_connector_fields",
+        "__weakref__",
+    )
+
     def __init__(
         self,
         server_url: str,
@@ -52,6 +68,9 @@ class SensoctoClient:
             heartbeat_interval_seconds: Heartbeat interval in seconds.
             **kwargs: Additional configuration options.
         """
+        if connector_id:
+            kwargs["connector_id"] = connector_id
+
         self._config = SensoctoConfig(
             server_url=server_url,
             bearer_token=bearer_token,
@@ -59,15 +78,13 @@ class SensoctoClient:
             connector_type=connector_type,
             auto_join_connector=auto_join_connector,
             heartbeat_interval_seconds=heartbeat_interval_seconds,
-            **{k: v for k, v in kwargs.items() if hasattr(SensoctoConfig, k)},
+            **{k: v for k, v in kwargs.items() if k in _CONFIG_FIELDS},
         )
 
-        if connector_id:
-            self._config.connector_id = connector_id
-
         self._socket: Optional[PhoenixSocket] = None
         self._state = ConnectionState.DISCONNECTED
         self._connector_joined = False
+        self._connector_fields = b""
 
     @classmethod
     def from_config(cls, config: SensoctoConfig) -> "SensoctoClient":
@@ -85,6 +102,7 @@ class SensoctoClient:
         client._socket = None
         client._state = ConnectionState.DISCONNECTED
         client._connector_joined = False
+        client._connector_fields = b""
         return client
 
     @property
@@ -95,7 +113,7 @@ class SensoctoClient:
     @property
     def is_connected(self) -> bool:
         """Returns whether the client is connected."""
-        return self._state == ConnectionState.CONNECTED
+        return self._state is ConnectionState.CONNECTED
 
     @property
     def connector_id(self) -> str:
@@ -110,14 +128,16 @@ class SensoctoClient:
     async def connect(self) -> None:
         """Connects to the Sensocto server."""
         self._config.validate()
+        self._connector_fields = self._encode_connector_fields()
 
         self._state = ConnectionState.CONNECTING
-        logger.info(f"Connecting to {self._config.server_url}")
+        logger.info("Connecting to %s", self._config.server_url)
 
         try:
             self._socket = PhoenixSocket(
                 url=self._config.websocket_url,
                 heartbeat_interval=self._config.heartbeat_interval_seconds,
+                compression=self._config.compression == "auto",
             )
 
             await self._socket.connect()
@@ -153,35 +173,32 @@ class SensoctoClient:
         Returns:
             A SensorStream for sending measurements.
         """
-        if not self.is_connected or not self._socket:
-            raise DisconnectedError()
+        stream, join_params = self._create_sensor_stream(config)
 
-        sensor_id = config.sensor_id
-        topic = f"sensocto:sensor:{sensor_id}"
+        await stream.join(join_params)
+        logger.info("Registered sensor: %s", stream.sensor_id)
 
-        join_params = {
-            "connector_id": self._config.connector_id,
-            "connector_name": self._config.connector_name,
-            "sensor_id": sensor_id,
-            "sensor_name": config.sensor_name,
-            "sensor_type": config.sensor_type,
-            "attributes": config.attributes,
-            "sampling_rate": config.sampling_rate_hz,
-            "batch_size": config.batch_size,
-            "bearer_token": self._config.bearer_token or "",
-        }
+        return stream
 
-        stream = SensorStream(
-            socket=self._socket,
-            topic=topic,
-            sensor_id=sensor_id,
-            config=config,
-        )
+    async def register_sensors(self, configs: List[SensorConfig]) -> List[SensorStream]:
+        """
+        Registers several sensors concurrently.
 
-        await stream.join(join_params)
-        logger.info(f"Registered sensor: {sensor_id}")
+        All channel joins are sent before any reply is awaited, so registering
+        N sensors takes about one round-trip instead of N.
 
-        return stream
+        Args:
+            configs: The sensor configurations.
+
+        Returns:
+            SensorStreams in the same order as configs.
+        """
+        pairs = [self._create_sensor_stream(config) for config in configs]
+
+        await asyncio.gather(*(stream.join(join_params) for stream, join_params in pairs))
+        logger.info("Registered %d sensors", len(pairs))
+
+        return [stream for stream, _ in pairs]
 
     async def join_call(
         self,
@@ -219,7 +236,7 @@ class SensoctoClient:
         )
 
         await session.join_channel(join_params)
-        logger.info(f"Joined call channel: {room_id}")
+        logger.info("Joined call channel: %s", room_id)
 
         return session
 
@@ -230,13 +247,13 @@ class SensoctoClient:
 
         topic = f"sensocto:connector:{self._config.connector_id}"
 
-        join_params = {
-            "connector_id": self._config.connector_id,
-            "connector_name": self._config.connector_name,
-            "connector_type": self._config.connector_type,
-            "features": self._config.features,
-            "bearer_token": self._config.bearer_token or "",
-        }
+        connector_fields = orjson.dumps(
+            {
+                "connector_type": self._config.connector_type,
+                "features": self._config.features,
+            }
+        )
+        join_params = orjson.Fragment(b"{" + self._connector_fields + b"," + connector_fields[1:])
 
         reply = await self._socket.send(topic, "phx_join", join_params)
 
@@ -244,7 +261,48 @@ class SensoctoClient:
             self._connector_joined = True
             logger.info("Joined connector channel")
         else:
-            logger.warning(f"Failed to join connector channel: {reply.response}")
+            logger.warning("Failed to join connector channel: %s", reply.response)
+
+    def _create_sensor_stream(self, config: SensorConfig) -> Tuple[SensorStream, Any]:
+        """Creates an unjoined SensorStream and the join params for its channel."""
+        if not self.is_connected or not self._socket:
+            raise DisconnectedError()
+
+        sensor_id = config.sensor_id
+        topic = f"sensocto:sensor:{sensor_id}"
+
+        sensor_fields = orjson.dumps(
+            {
+                "sensor_id": sensor_id,
+                "sensor_name": config.sensor_name,
+                "sensor_type": config.sensor_type,
+                "attributes": config.attributes,
+                "sampling_rate": config.sampling_rate_hz,
+                "batch_size": config.batch_size,
+            }
+        )
+        join_params = orjson.Fragment(b"{" + self._connector_fields + b"," + sensor_fields[1:])
+
+        stream = SensorStream(
+            socket=self._socket,
+            topic=topic,
+            sensor_id=sensor_id,
+            config=config,
+        )
+
+        return stream, join_params
+
+    def _encode_connector_fields(self) -> bytes:
+        """Encodes the connector-scoped join fields shared by every channel join."""
+        fields = orjson.dumps(
+            {
+                "connector_id": self._config.connector_id,
+                "connector_name": self._config.connector_name,
+                "bearer_token": self._config.bearer_token or "",
+            }
+        )
+        # Strip the braces so per-channel fields can be spliced in after it
+        return fields[1:-1]
 
     async def __aenter__(self) -> "SensoctoClient":
         """Async context manager entry."""
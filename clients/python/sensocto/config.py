@@ -3,11 +3,16 @@
 import uuid
 from dataclasses import dataclass, field
 from typing import List, Optional
-from urllib.parse import urlparse
+from urllib.parse import ParseResult, urlparse
 
 from sensocto.errors import InvalidConfigError
 
 
+def _generate_id() -> str:
+    """Generates a random identifier (hex form skips the dashed string formatting)."""
+    return uuid.uuid4().hex
+
+
 @dataclass
 class SensoctoConfig:
     """Configuration for the Sensocto client."""
@@ -15,7 +20,7 @@ class SensoctoConfig:
     server_url: str
     """The Sensocto server URL."""
 
-    connector_id: str = field(default_factory=lambda: str(uuid.uuid4()))
+    connector_id: str = field(default_factory=_generate_id)
     """Unique identifier for this connector."""
 
     connector_name: str = "Python Connector"
@@ -45,6 +50,11 @@ class SensoctoConfig:
     features: List[str] = field(default_factory=list)
     """Supported features."""
 
+    compression: str = "off"
+    """WebSocket compression: "off" or "auto" (negotiate permessage-deflate)."""
+
+    _websocket_url: Optional[str] = field(default=None, init=False, repr=False, compare=False)
+
     def validate(self) -> None:
         """Validates the configuration."""
         if not self.server_url:
@@ -60,10 +70,21 @@ class SensoctoConfig:
         if self.heartbeat_interval_seconds < 1.0:
             raise InvalidConfigError("Heartbeat interval must be at least 1 second")
 
+        if self.compression not in ("off", "auto"):
+            raise InvalidConfigError('Compression must be "off" or "auto"')
+
+        self._websocket_url = self._build_websocket_url(parsed)
+
     @property
     def websocket_url(self) -> str:
-        """Returns the WebSocket URL for connecting."""
-        parsed = urlparse(self.server_url)
+        """Returns the WebSocket URL for connecting (computed by validate())."""
+        if self._websocket_url is None:
+            self._websocket_url = self._build_websocket_url(urlparse(self.server_url))
+        return self._websocket_url
+
+    @staticmethod
+    def _build_websocket_url(parsed: ParseResult) -> str:
+        """Builds the WebSocket URL from a parsed server URL."""
         protocol = "wss" if parsed.scheme == "https" else "ws"
         port = f":{parsed.port}" if parsed.port else ""
         return f"{protocol}://{parsed.hostname}{port}/socket/websocket"
@@ -76,7 +97,7 @@ class SensorConfig:
     sensor_name: str
     """Human-readable name for the sensor."""
 
-    sensor_id: str = field(default_factory=lambda: str(uuid.uuid4()))
+    sensor_id: str = field(default_factory=_generate_id)
     """Unique sensor identifier."""
 
     sensor_type: str = "generic"
@@ -0,0 +1,66 @@
+"""Event loop helpers for the Sensocto client."""
+
+import asyncio
+import os
+import warnings
+from typing import Any, Coroutine, TypeVar, cast
+
+T = TypeVar("T")
+
+
+def run(main: Coroutine[Any, Any, T], use_uvloop: bool = True) -> T:
+    """
+    Runs a coroutine on a new event loop, using uvloop when it is installed.
+
+    uvloop is the supported loop for SensoctoClient; install it with
+    ``pip install sensocto[speedups]``. Falls back to asyncio.run() otherwise.
+
+    Args:
+        main: The coroutine to run.
+        use_uvloop: Whether to use uvloop if it is available.
+
+    Returns:
+        The coroutine's result.
+    """
+    if use_uvloop:
+        try:
+            import uvloop
+        except ImportError:
+            pass
+        else:
+            return cast(T, uvloop.run(main))
+
+    return asyncio.run(main)
+
+
+def install_fast_loop() -> bool:
+    """
+    Makes uvloop the default event loop policy if it is installed.
+
+    Only loops created after this call use uvloop, so call it before
+    asyncio.run(). Importing sensocto with ``SENSOCTO_UVLOOP=1`` set in the
+    environment calls it automatically.
+
+    This goes through the event loop policy API, which Python 3.14 deprecates,
+    and only exists for programs that must keep an asyncio.run() entry point.
+    Prefer run(), which uses uvloop.run() and needs no policy. The deprecation
+    warning is suppressed here so the opt-in does not warn on every start.
+
+    Returns:
+        True if uvloop was installed, False if it is not available.
+    """
+    try:
+        import uvloop
+    except ImportError:
+        return False
+
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", DeprecationWarning)
+        asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+    return True
+
+
+def _install_from_env() -> None:
+    """Installs uvloop when SENSOCTO_UVLOOP=1 is set."""
+    if os.environ.get("SENSOCTO_UVLOOP") == "1":
+        install_fast_loop()
@@ -1,12 +1,18 @@
 """Data models for the Sensocto client."""
 
-from dataclasses import dataclass
-from datetime import datetime
+import sys
+from dataclasses import dataclass, field
 from enum import Enum
+from itertools import compress
+from time import time_ns
 from typing import Any, Dict, List, Optional, Union
 
 from pydantic import BaseModel, Field
 
+# Hot-path records are allocated per frame; slots keep them small where supported (3.10+).
+_SLOTS_OPTIONS: Dict[str, Any] = {"slots": True} if sys.version_info >= (3, 10) else {}
+_EVENT_OPTIONS: Dict[str, Any] = {"frozen": True, **_SLOTS_OPTIONS}
+
 
 class ConnectionState(str, Enum):
     """Connection state of the client."""
@@ -57,14 +63,18 @@ class RoomRole(str, Enum):
     MEMBER = "member"
 
 
-class Measurement(BaseModel):
+@dataclass(**_SLOTS_OPTIONS)
+class Measurement:
     """A single sensor measurement."""
 
-    attribute_id: str = Field(..., description="The attribute identifier")
-    payload: Union[Dict[str, Any], float, int, List[Any]] = Field(
-        ..., description="The measurement payload"
-    )
-    timestamp: int = Field(..., description="Unix timestamp in milliseconds")
+    attribute_id: str
+    """The attribute identifier."""
+
+    payload: Union[Dict[str, Any], float, int, List[Any]]
+    """The measurement payload."""
+
+    timestamp: int
+    """Unix timestamp in milliseconds."""
 
     @classmethod
     def create(
@@ -75,11 +85,12 @@ class Measurement(BaseModel):
     ) -> "Measurement":
         """Creates a measurement with optional auto-generated timestamp."""
         if timestamp is None:
-            timestamp = int(datetime.utcnow().timestamp() * 1000)
+            timestamp = time_ns() // 1_000_000
         return cls(attribute_id=attribute_id, payload=payload, timestamp=timestamp)
 
 
-class BackpressureConfig(BaseModel):
+@dataclass(**_SLOTS_OPTIONS)
+class BackpressureConfig:
     """Backpressure configuration from the server."""
 
     attention_level: AttentionLevel = AttentionLevel.NONE
@@ -87,7 +98,7 @@ class BackpressureConfig(BaseModel):
     recommended_batch_size: int = 5
     timestamp: int = 0
     paused: bool = False
-    system_load: float = 0.0
+    system_load: str = "normal"
     load_multiplier: float = 1.0
     memory_protection_active: bool = False
 
@@ -106,7 +117,7 @@ class BackpressureConfig(BaseModel):
             recommended_batch_size=payload.get("recommended_batch_size", 5),
             timestamp=payload.get("timestamp", 0),
             paused=payload.get("paused", False),
-            system_load=payload.get("system_load", 0.0),
+            system_load=payload.get("system_load", "normal"),
             load_multiplier=payload.get("load_multiplier", 1.0),
             memory_protection_active=payload.get("memory_protection_active", False),
         )
@@ -142,6 +153,53 @@ class CallParticipant(BaseModel):
     audio_enabled: bool = False
     video_enabled: bool = False
 
+    @classmethod
+    def from_payload(cls, payload: Dict[str, Any], user_id: str = "") -> "CallParticipant":
+        """
+        Creates a CallParticipant from a server payload.
+
+        The payload comes straight from the decoded channel message, so the
+        model is constructed without a second validation pass.
+
+        Args:
+            payload: Participant map sent by the server.
+            user_id: Fallback user ID when the payload does not carry one.
+        """
+        return cls.model_construct(
+            user_id=payload.get("user_id", user_id),
+            endpoint_id=payload.get("endpoint_id", ""),
+            user_info=payload.get("user_info", {}),
+            joined_at=payload.get("joined_at"),
+            audio_enabled=payload.get("audio_enabled", False),
+            video_enabled=payload.get("video_enabled", False),
+        )
+
+
+@dataclass
+class ParticipantColumns:
+    """
+    Column-oriented view of call participants.
+
+    Each list holds one entry per participant in the same order, so scans such
+    as "who has audio on" walk a single list instead of every participant object.
+    """
+
+    user_ids: List[str] = field(default_factory=list)
+    endpoint_ids: List[str] = field(default_factory=list)
+    audio_enabled: List[bool] = field(default_factory=list)
+    video_enabled: List[bool] = field(default_factory=list)
+
+    def __len__(self) -> int:
+        return len(self.user_ids)
+
+    def with_audio(self) -> List[str]:
+        """Returns the user IDs of participants with audio enabled."""
+        return list(compress(self.user_ids, self.audio_enabled))
+
+    def with_video(self) -> List[str]:
+        """Returns the user IDs of participants with video enabled."""
+        return list(compress(self.user_ids, self.video_enabled))
+
 
 class IceServer(BaseModel):
     """ICE server configuration for WebRTC."""
@@ -151,21 +209,21 @@ class IceServer(BaseModel):
     credential: Optional[str] = None
 
 
-@dataclass
+@dataclass(**_EVENT_OPTIONS)
 class SensorEvent:
     """Base class for sensor events."""
 
     pass
 
 
-@dataclass
+@dataclass(**_EVENT_OPTIONS)
 class BackpressureConfigEvent(SensorEvent):
     """Backpressure configuration update event."""
 
     config: BackpressureConfig
 
 
-@dataclass
+@dataclass(**_EVENT_OPTIONS)
 class GenericSensorEvent(SensorEvent):
     """Generic sensor event with payload."""
 
@@ -173,21 +231,21 @@ class GenericSensorEvent(SensorEvent):
     payload: Dict[str, Any]
 
 
-@dataclass
+@dataclass(**_EVENT_OPTIONS)
 class CallEvent:
     """Base class for call events."""
 
     pass
 
 
-@dataclass
+@dataclass(**_EVENT_OPTIONS)
 class ParticipantJoinedEvent(CallEvent):
     """Event when a participant joins."""
 
     participant: CallParticipant
 
 
-@dataclass
+@dataclass(**_EVENT_OPTIONS)
 class ParticipantLeftEvent(CallEvent):
     """Event when a participant leaves."""
 
@@ -195,14 +253,14 @@ class ParticipantLeftEvent(CallEvent):
     crashed: bool = False
 
 
-@dataclass
+@dataclass(**_EVENT_OPTIONS)
 class MediaEventReceived(CallEvent):
     """WebRTC media event received."""
 
     data: Any
 
 
-@dataclass
+@dataclass(**_EVENT_OPTIONS)
 class ParticipantAudioChangedEvent(CallEvent):
     """Event when participant audio state changes."""
 
@@ -210,7 +268,7 @@ class ParticipantAudioChangedEvent(CallEvent):
     enabled: bool
 
 
-@dataclass
+@dataclass(**_EVENT_OPTIONS)
 class ParticipantVideoChangedEvent(CallEvent):
     """Event when participant video state changes."""
 
@@ -218,14 +276,14 @@ class ParticipantVideoChangedEvent(CallEvent):
     enabled: bool
 
 
-@dataclass
+@dataclass(**_EVENT_OPTIONS)
 class QualityChangedEvent(CallEvent):
     """Event when call quality changes."""
 
     quality: str
 
 
-@dataclass
+@dataclass(**_EVENT_OPTIONS)
 class CallEndedEvent(CallEvent):
     """Event when call ends."""
 
@@ -3,27 +3,40 @@
 import asyncio
 import logging
 import re
-from datetime import datetime
-from typing import Any, Callable, Dict, List, Optional, Union
+from functools import lru_cache
+from time import time_ns
+from typing import Any, Callable, Dict, List, Optional, Sequence, Union
+
+import orjson
 
 from sensocto.config import SensorConfig
 from sensocto.errors import DisconnectedError, InvalidAttributeIdError
-from sensocto.models import BackpressureConfig, Measurement
-from sensocto.socket import PhoenixSocket
+from sensocto.models import BackpressureConfig
+from sensocto.socket import _PAYLOAD_OPTIONS, PhoenixSocket
 
 logger = logging.getLogger(__name__)
 
+# Credit window: producers wait for the socket writer once this many frames are
+# queued but not yet written, so a stalled connection cannot grow the queue unbounded.
+_MAX_PENDING_FRAMES = 256
+
 # Regex pattern for validating attribute IDs
-ATTRIBUTE_ID_PATTERN = re.compile(r"^[a-zA-Z][a-zA-Z0-9_-]{0,63}$")
+ATTRIBUTE_ID_PATTERN = re.compile(r"\A[a-zA-Z][a-zA-Z0-9_-]{0,63}\Z")
 
 
+@lru_cache(maxsize=256)
 def validate_attribute_id(attribute_id: str) -> None:
-    """Validates an attribute ID."""
+    """
+    Validates an attribute ID.
+
+    Sensors reuse a small set of attribute IDs, so IDs that pass are cached and
+    later checks for them skip the scan. Invalid IDs raise and are not cached.
+    """
     if not attribute_id:
         raise InvalidAttributeIdError(attribute_id, "Attribute ID cannot be empty")
     if len(attribute_id) > 64:
         raise InvalidAttributeIdError(attribute_id, "Attribute ID cannot exceed 64 characters")
-    if not ATTRIBUTE_ID_PATTERN.match(attribute_id):
+    if not ATTRIBUTE_ID_PATTERN.fullmatch(attribute_id):
         raise InvalidAttributeIdError(
             attribute_id,
             "Attribute ID must start with a letter and contain only "
@@ -34,6 +47,20 @@ def validate_attribute_id(attribute_id: str) -> None:
 class SensorStream:
     """Stream for sending sensor measurements to the server."""
 
+    __slots__ = (
+        "_socket",
+        "_topic",
+        "_sensor_id",
+        "_config",
+        "_joined",
+        "_backpressure",
+        "_on_backpressure",
+        "_batch_buffer",
+        "_batch_started",
+        "_flush_handle",
+        "__weakref__",
+    )
+
     def __init__(
         self,
         socket: PhoenixSocket,
@@ -55,8 +82,9 @@ class SensorStream:
         self._sensor_id = sensor_id
         self._config = config
         self._joined = False
-        self._batch_buffer: List[Measurement] = []
-        self._batch_lock = asyncio.Lock()
+        self._batch_buffer: List[bytes] = []
+        self._batch_started = 0.0
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
         self._backpressure = BackpressureConfig()
         self._on_backpressure: Optional[Callable[[BackpressureConfig], None]] = None
 
@@ -87,12 +115,13 @@ class SensorStream:
         """
         self._on_backpressure = handler
 
-    async def join(self, join_params: Dict[str, Any]) -> Dict[str, Any]:
+    async def join(self, join_params: Any) -> Dict[str, Any]:
         """
         Joins the sensor channel.
 
         Args:
-            join_params: Parameters for joining the channel.
+            join_params: Parameters for joining the channel, as a dict or a
+                pre-encoded orjson.Fragment.
 
         Returns:
             The join response from the server.
@@ -101,7 +130,7 @@ class SensorStream:
 
         if reply.is_ok:
             self._joined = True
-            logger.info(f"Joined sensor channel: {self._topic}")
+            logger.info("Joined sensor channel: %s", self._topic)
             return reply.response
         else:
             raise Exception(f"Failed to join channel: {reply.response}")
@@ -116,7 +145,7 @@ class SensorStream:
 
         await self._socket.send(self._topic, "phx_leave", {})
         self._joined = False
-        logger.info(f"Left sensor channel: {self._topic}")
+        logger.info("Left sensor channel: %s", self._topic)
 
     async def send_measurement(
         self,
@@ -138,15 +167,20 @@ class SensorStream:
         validate_attribute_id(attribute_id)
 
         if timestamp is None:
-            timestamp = int(datetime.utcnow().timestamp() * 1000)
-
-        message = {
-            "attribute_id": attribute_id,
-            "payload": payload,
-            "timestamp": timestamp,
-        }
+            timestamp = time_ns() // 1_000_000
 
-        await self._socket.send_no_reply(self._topic, "measurement", message)
+        # The socket caches the {"topic":...,"event":"measurement","payload": prefix
+        # for this stream, so only the measurement body is serialized here.
+        self._socket.send_nowait(
+            self._topic,
+            "measurement",
+            {
+                "attribute_id": attribute_id,
+                "payload": payload,
+                "timestamp": timestamp,
+            },
+        )
+        await self._wait_for_credit()
 
     async def add_to_batch(
         self,
@@ -157,8 +191,13 @@ class SensorStream:
         """
         Adds a measurement to the batch buffer.
 
-        The batch will be sent when it reaches the configured size or when
-        flush_batch() is called.
+        The batch will be sent when it reaches the recommended batch size, when
+        the recommended batch window has passed since its first measurement,
+        or when flush_batch() is called. Measurements are serialized to JSON as they
+        are added, without building a Measurement: the attribute ID is checked with
+        validate_attribute_id(), but the payload is not validated beyond being
+        JSON-serializable, so callers must check it themselves.
+        Waits only when the socket has a full window of unwritten frames.
 
         Args:
             attribute_id: The attribute identifier.
@@ -171,47 +210,124 @@ class SensorStream:
         validate_attribute_id(attribute_id)
 
         if timestamp is None:
-            timestamp = int(datetime.utcnow().timestamp() * 1000)
+            timestamp = time_ns() // 1_000_000
+
+        backpressure = self._backpressure
+        if backpressure.paused:
+            return
 
-        measurement = Measurement(
-            attribute_id=attribute_id,
-            payload=payload,
-            timestamp=timestamp,
+        buffer = self._batch_buffer
+        if not buffer:
+            self._batch_started = asyncio.get_running_loop().time()
+        buffer.append(
+            orjson.dumps(
+                {
+                    "attribute_id": attribute_id,
+                    "payload": payload,
+                    "timestamp": timestamp,
+                },
+                option=_PAYLOAD_OPTIONS,
+            )
         )
 
-        if self._backpressure.paused:
-            return
+        if len(buffer) >= backpressure.recommended_batch_size:
+            self._flush_batch_internal()
+            await self._wait_for_credit()
+        elif self._flush_handle is None:
+            self._schedule_flush()
+
+    async def send_measurement_array(
+        self,
+        attribute_id: str,
+        values: Sequence[Any],
+        timestamps: Optional[Sequence[int]] = None,
+    ) -> None:
+        """
+        Sends many samples of one attribute as a single measurements_batch frame.
+
+        NumPy arrays are converted with tolist() and all rows are serialized in
+        one orjson call, instead of one add_to_batch() call per sample.
+
+        Args:
+            attribute_id: The attribute identifier.
+            values: The sample payloads (a sequence or NumPy array).
+            timestamps: Optional per-sample timestamps in milliseconds; all
+                samples use the current time if not provided.
+        """
+        if not self.is_active:
+            raise DisconnectedError()
+
+        validate_attribute_id(attribute_id)
+
+        if hasattr(values, "tolist"):
+            values = values.tolist()
+        if timestamps is None:
+            timestamps = [time_ns() // 1_000_000] * len(values)
+        elif hasattr(timestamps, "tolist"):
+            timestamps = timestamps.tolist()
 
-        async with self._batch_lock:
-            self._batch_buffer.append(measurement)
+        if len(timestamps) != len(values):
+            raise ValueError("values and timestamps must have the same length")
 
-            batch_size = self._backpressure.recommended_batch_size
-            if len(self._batch_buffer) >= batch_size:
-                await self._flush_batch_internal()
+        if not values or self._backpressure.paused:
+            return
+
+        rows = orjson.dumps(
+            [
+                {"attribute_id": attribute_id, "payload": value, "timestamp": timestamp}
+                for value, timestamp in zip(values, timestamps)
+            ],
+            option=_PAYLOAD_OPTIONS,
+        )
+        self._socket.send_nowait(self._topic, "measurements_batch", orjson.Fragment(rows))
+        await self._wait_for_credit()
 
     async def flush_batch(self) -> None:
         """Flushes any pending measurements in the batch buffer."""
-        async with self._batch_lock:
-            await self._flush_batch_internal()
+        self._flush_batch_internal()
+
+    def _flush_batch_internal(self) -> None:
+        """
+        Swaps out the batch buffer and queues it as one measurements_batch frame.
+
+        Nothing here awaits, so the swap and enqueue cannot interleave with
+        another coroutine appending to the buffer and no lock is needed.
+        """
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
 
-    async def _flush_batch_internal(self) -> None:
-        """Internal method to flush the batch (must be called with lock held)."""
         if not self._batch_buffer:
             return
 
-        measurements = [
-            {
-                "attribute_id": m.attribute_id,
-                "payload": m.payload,
-                "timestamp": m.timestamp,
-            }
-            for m in self._batch_buffer
-        ]
+        fragments = self._batch_buffer
+        self._batch_buffer = []
 
-        self._batch_buffer.clear()
+        logger.debug("Flushing batch of %d measurements", len(fragments))
+        measurements = orjson.Fragment(b"[" + b",".join(fragments) + b"]")
+        self._socket.send_nowait(self._topic, "measurements_batch", measurements)
 
-        logger.debug(f"Flushing batch of {len(measurements)} measurements")
-        await self._socket.send_no_reply(self._topic, "measurements_batch", measurements)
+    async def _wait_for_credit(self) -> None:
+        """Waits for the socket writer to catch up when the credit window is used up."""
+        if self._socket.pending_frames >= _MAX_PENDING_FRAMES:
+            await self._socket.flush()
+
+    def _schedule_flush(self) -> None:
+        """Arms the timer that flushes the batch one batch window after its first measurement."""
+        deadline = self._batch_started + self._backpressure.recommended_batch_window / 1000
+        self._flush_handle = asyncio.get_running_loop().call_at(deadline, self._on_flush_timer)
+
+    def _on_flush_timer(self) -> None:
+        """Flushes a batch that has waited for the full batch window."""
+        self._flush_handle = None
+        if not self.is_active:
+            # The socket went away without leave(); keep the batch for the next flush
+            logger.debug("Skipping batch flush, stream is not active")
+            return
+        try:
+            self._flush_batch_internal()
+        except Exception as e:
+            logger.error("Error flushing batch: %s", e)
 
     async def update_attribute(
         self,
@@ -242,14 +358,21 @@ class SensorStream:
 
     def _handle_backpressure(self, payload: Dict[str, Any]) -> None:
         """Handles backpressure configuration from the server."""
+        window = self._backpressure.recommended_batch_window
         self._backpressure = BackpressureConfig.from_payload(payload)
-        logger.debug(f"Backpressure config updated: {self._backpressure}")
+        logger.debug("Backpressure config updated: %s", self._backpressure)
+
+        # Re-arm a pending flush so the new window applies to the current batch,
+        # still counted from its first measurement
+        if self._flush_handle is not None and self._backpressure.recommended_batch_window != window:
+            self._flush_handle.cancel()
+            self._schedule_flush()
 
         if self._on_backpressure:
             try:
                 self._on_backpressure(self._backpressure)
             except Exception as e:
-                logger.error(f"Error in backpressure handler: {e}")
+                logger.error("Error in backpressure handler: %s", e)
 
     async def close(self) -> None:
         """Closes the sensor stream."""
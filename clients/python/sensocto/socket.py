@@ -1,18 +1,41 @@
 """Phoenix WebSocket implementation for Python."""
 
 import asyncio
-import json
 import logging
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
-from typing import Any, Callable, Dict, List, Optional
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple, Union
 
+import orjson
 import websockets
 from websockets.client import WebSocketClientProtocol
 
-from sensocto.errors import ConnectionError, TimeoutError
+from sensocto.errors import ConnectionError, DisconnectedError, TimeoutError
+from sensocto.loop import _install_from_env
 
 logger = logging.getLogger(__name__)
 
+_install_from_env()
+
+# Keep stdlib json's leniency for numpy scalars and non-string dict keys in payloads
+_PAYLOAD_OPTIONS = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+
+# How long disconnect() waits for queued frames to be written before closing.
+_DRAIN_TIMEOUT = 5.0
+
+# Upper bound on frames the writer takes from the queue per wakeup, so flush()
+# callers are released regularly while producers keep the queue full.
+_MAX_WRITE_BATCH = 256
+
+# Size of the reply slot table (a power of two). A request whose slot is still
+# taken by an outstanding request 4096 refs older falls back to a dict.
+_REPLY_SLOTS = 4096
+_REPLY_MASK = _REPLY_SLOTS - 1
+
+# Frames larger than this are parsed on a worker thread so the loop keeps running.
+_LARGE_FRAME_BYTES = 16 * 1024
+
 
 @dataclass
 class PhoenixMessage:
@@ -25,19 +48,24 @@ class PhoenixMessage:
 
     def to_json(self) -> str:
         """Serializes the message to JSON."""
-        return json.dumps(
+        return orjson.dumps(
             {
                 "topic": self.topic,
                 "event": self.event,
                 "payload": self.payload,
                 "ref": self.ref,
-            }
-        )
+            },
+            option=_PAYLOAD_OPTIONS,
+        ).decode()
 
     @classmethod
-    def from_json(cls, data: str) -> "PhoenixMessage":
+    def from_json(cls, data: Union[str, bytes]) -> "PhoenixMessage":
         """Deserializes a message from JSON."""
-        obj = json.loads(data)
+        return cls.from_dict(orjson.loads(data))
+
+    @classmethod
+    def from_dict(cls, obj: Dict[str, Any]) -> "PhoenixMessage":
+        """Creates a message from an already decoded JSON object."""
         return cls(
             topic=obj.get("topic", ""),
             event=obj.get("event", ""),
@@ -70,39 +98,71 @@ EventHandler = Callable[[Dict[str, Any]], None]
 class PhoenixSocket:
     """Phoenix WebSocket client."""
 
-    def __init__(self, url: str, heartbeat_interval: float = 30.0):
+    def __init__(self, url: str, heartbeat_interval: float = 30.0, compression: bool = False):
         """
         Creates a new Phoenix socket.
 
         Args:
             url: WebSocket URL (e.g., wss://example.com/socket/websocket)
             heartbeat_interval: Heartbeat interval in seconds.
+            compression: Whether to offer permessage-deflate. Phoenix frames are
+                small, so compressing them costs more CPU than it saves.
         """
         self._url = url
         self._heartbeat_interval = heartbeat_interval
+        self._compression = "deflate" if compression else None
         self._ws: Optional[WebSocketClientProtocol] = None
         self._ref_counter = 0
-        self._pending_replies: Dict[str, asyncio.Future[PhoenixReply]] = {}
-        self._event_handlers: Dict[str, List[EventHandler]] = {}
+        self._reply_refs: List[int] = [0] * _REPLY_SLOTS
+        self._reply_futures: List[Optional[asyncio.Future[PhoenixReply]]] = [None] * _REPLY_SLOTS
+        self._overflow_replies: Dict[int, asyncio.Future[PhoenixReply]] = {}
+        self._event_handlers: Dict[Tuple[str, str], Union[EventHandler, List[EventHandler]]] = {}
+        self._envelope_prefixes: Dict[Tuple[str, str], bytes] = {}
         self._connected = False
         self._receive_task: Optional[asyncio.Task] = None
         self._heartbeat_task: Optional[asyncio.Task] = None
-        self._lock = asyncio.Lock()
+        self._heartbeat_ref: Optional[str] = None
+        self._shutdown: Optional[asyncio.Event] = None
+        self._writer_task: Optional[asyncio.Task] = None
+        self._out_queue: Optional[asyncio.Queue[Optional[str]]] = None
+        self._queued_seq = 0
+        self._written_seq = 0
+        self._flush_waiters: Deque[Tuple[int, asyncio.Future[None]]] = deque()
+        self._parse_executor: Optional[ThreadPoolExecutor] = None
 
     @property
     def is_connected(self) -> bool:
         """Returns whether the socket is connected."""
         return self._connected and self._ws is not None
 
+    @property
+    def pending_frames(self) -> int:
+        """Returns the number of queued frames the writer has not written yet."""
+        return self._queued_seq - self._written_seq
+
     async def connect(self) -> None:
-        """Connects to the Phoenix server."""
-        logger.info(f"Connecting to {self._url}")
+        """
+        Connects to the Phoenix server.
+
+        Runs on whatever loop is current. Set ``SENSOCTO_UVLOOP=1`` or call
+        sensocto.install_fast_loop() before starting the loop to use uvloop.
+        """
+        logger.info("Connecting to %s", self._url)
 
         try:
-            self._ws = await websockets.connect(self._url)
+            # Liveness is checked by the Phoenix heartbeat, so skip websockets' own pings
+            self._ws = await websockets.connect(
+                self._url, compression=self._compression, ping_interval=None
+            )
             self._connected = True
+            self._heartbeat_ref = None
 
             # Start background tasks
+            self._out_queue = asyncio.Queue()
+            self._queued_seq = 0
+            self._written_seq = 0
+            self._shutdown = asyncio.Event()
+            self._writer_task = asyncio.create_task(self._writer_loop())
             self._receive_task = asyncio.create_task(self._receive_loop())
             self._heartbeat_task = asyncio.create_task(self._heartbeat_loop())
 
@@ -113,21 +173,38 @@ class PhoenixSocket:
     async def disconnect(self) -> None:
         """Disconnects from the Phoenix server."""
         self._connected = False
+        if self._shutdown:
+            self._shutdown.set()
+
+        # Let the writer flush frames that were queued before the disconnect
+        if self._writer_task:
+            if self._out_queue is not None:
+                self._out_queue.put_nowait(None)
+            # asyncio.wait() only times out; a cancellation of disconnect() itself
+            # still propagates
+            done, _ = await asyncio.wait({self._writer_task}, timeout=_DRAIN_TIMEOUT)
+            if not done:
+                self._writer_task.cancel()
+                await asyncio.wait({self._writer_task})
+            self._writer_task = None
+        self._out_queue = None
 
         # Cancel background tasks
         if self._receive_task:
             self._receive_task.cancel()
-            try:
-                await self._receive_task
-            except asyncio.CancelledError:
-                pass
+            await asyncio.wait({self._receive_task})
 
+        # The heartbeat loop wakes on the shutdown event and returns by itself,
+        # unless it is still stuck sending; cancel it then
         if self._heartbeat_task:
-            self._heartbeat_task.cancel()
-            try:
-                await self._heartbeat_task
-            except asyncio.CancelledError:
-                pass
+            if not self._heartbeat_task.done():
+                self._heartbeat_task.cancel()
+            await asyncio.wait({self._heartbeat_task})
+            self._heartbeat_task = None
+
+        if self._parse_executor:
+            self._parse_executor.shutdown(wait=False)
+            self._parse_executor = None
 
         # Close WebSocket
         if self._ws:
@@ -157,20 +234,18 @@ class PhoenixSocket:
         """
         ref = self._generate_ref()
 
-        message = PhoenixMessage(
-            topic=topic,
-            event=event,
-            payload=payload,
-            ref=ref,
-        )
-
         # Create future for reply
-        future: asyncio.Future[PhoenixReply] = asyncio.get_event_loop().create_future()
-        self._pending_replies[ref] = future
+        future: asyncio.Future[PhoenixReply] = asyncio.get_running_loop().create_future()
+        slot = ref & _REPLY_MASK
+        if self._reply_futures[slot] is None:
+            self._reply_refs[slot] = ref
+            self._reply_futures[slot] = future
+        else:
+            self._overflow_replies[ref] = future
 
         try:
-            # Send message
-            await self._send_raw(message.to_json())
+            # Queue message
+            self._send_raw(self._encode(topic, event, payload, str(ref)))
 
             # Wait for reply with timeout
             try:
@@ -179,27 +254,56 @@ class PhoenixSocket:
             except asyncio.TimeoutError:
                 raise TimeoutError(int(timeout * 1000))
         finally:
-            self._pending_replies.pop(ref, None)
+            if self._reply_futures[slot] is future:
+                self._reply_futures[slot] = None
+            else:
+                self._overflow_replies.pop(ref, None)
 
     async def send_no_reply(self, topic: str, event: str, payload: Any) -> None:
         """
         Sends a message without waiting for a reply.
 
+        The frame is queued for the writer task, so this returns without
+        waiting for the network write.
+
         Args:
             topic: The channel topic.
             event: The event name.
             payload: The message payload.
         """
-        ref = self._generate_ref()
+        self.send_nowait(topic, event, payload)
 
-        message = PhoenixMessage(
-            topic=topic,
-            event=event,
-            payload=payload,
-            ref=ref,
-        )
+    def send_nowait(self, topic: str, event: str, payload: Any) -> None:
+        """
+        Queues a message without waiting for a reply or for the write.
+
+        Use flush() when the caller needs to know the frame has been written.
+        No ref is attached, so the message never touches the reply table.
+
+        Args:
+            topic: The channel topic.
+            event: The event name.
+            payload: The message payload.
+        """
+        self._send_raw(self._encode(topic, event, payload, None))
+
+    async def flush(self) -> None:
+        """
+        Waits until every frame queued so far has been written to the WebSocket.
+
+        Raises:
+            DisconnectedError: If the connection closes before those frames are written.
+        """
+        target = self._queued_seq
+        if self._written_seq >= target:
+            return
+
+        if not self._writer_task or self._writer_task.done():
+            raise DisconnectedError()
 
-        await self._send_raw(message.to_json())
+        future: asyncio.Future[None] = asyncio.get_running_loop().create_future()
+        self._flush_waiters.append((target, future))
+        await future
 
     def on(self, topic: str, event: str, handler: EventHandler) -> None:
         """
@@ -210,10 +314,18 @@ class PhoenixSocket:
             event: The event name.
             handler: The callback function.
         """
-        key = f"{topic}:{event}"
-        if key not in self._event_handlers:
-            self._event_handlers[key] = []
-        self._event_handlers[key].append(handler)
+        self._add_handler((topic, event), handler)
+
+    def register_topic(self, topic: str, handlers: Dict[str, EventHandler]) -> None:
+        """
+        Registers handlers for several events of a topic in one call.
+
+        Args:
+            topic: The channel topic.
+            handlers: Mapping of event name to callback function.
+        """
+        for event, handler in handlers.items():
+            self._add_handler((topic, event), handler)
 
     def off(self, topic: str, event: str, handler: Optional[EventHandler] = None) -> None:
         """
@@ -224,28 +336,141 @@ class PhoenixSocket:
             event: The event name.
             handler: The specific handler to remove, or None to remove all.
         """
-        key = f"{topic}:{event}"
+        key = (topic, event)
+        current = self._event_handlers.get(key)
+        if current is None:
+            return
+
         if handler is None:
-            self._event_handlers.pop(key, None)
-        elif key in self._event_handlers:
+            del self._event_handlers[key]
+        elif isinstance(current, list):
             try:
-                self._event_handlers[key].remove(handler)
+                current.remove(handler)
             except ValueError:
-                pass
-
-    async def _send_raw(self, data: str) -> None:
-        """Sends raw data through the WebSocket."""
-        if not self._ws:
+                return
+            if len(current) == 1:
+                self._event_handlers[key] = current[0]
+        elif current == handler:
+            del self._event_handlers[key]
+
+    def _add_handler(self, key: Tuple[str, str], handler: EventHandler) -> None:
+        """Adds a handler, storing it bare until a second one joins the same key."""
+        current = self._event_handlers.get(key)
+        if current is None:
+            self._event_handlers[key] = handler
+        elif isinstance(current, list):
+            current.append(handler)
+        else:
+            self._event_handlers[key] = [current, handler]
+
+    def _encode(self, topic: str, event: str, payload: Any, ref: Optional[str]) -> str:
+        """Encodes a Phoenix message, reusing the cached topic/event prefix."""
+        key = (topic, event)
+        prefix = self._envelope_prefixes.get(key)
+        if prefix is None:
+            prefix = (
+                b'{"topic":'
+                + orjson.dumps(topic)
+                + b',"event":'
+                + orjson.dumps(event)
+                + b',"payload":'
+            )
+            if event == "phx_leave":
+                # The channel is closing, so drop its prefixes instead of keeping
+                # them for every topic ever joined over the life of the socket
+                self._forget_topic(topic)
+            else:
+                self._envelope_prefixes[key] = prefix
+
+        # Phoenix expects JSON in text frames, so hand websockets a str
+        body = orjson.dumps(payload, option=_PAYLOAD_OPTIONS)
+        return (prefix + body + b',"ref":' + orjson.dumps(ref) + b"}").decode()
+
+    def _forget_topic(self, topic: str) -> None:
+        """Drops the cached envelope prefixes of a topic."""
+        prefixes = self._envelope_prefixes
+        for key in [key for key in prefixes if key[0] == topic]:
+            del prefixes[key]
+
+    def _send_raw(self, data: str) -> None:
+        """Queues raw data for the writer task."""
+        if not self._ws or self._out_queue is None:
             raise ConnectionError("Not connected")
 
-        async with self._lock:
-            await self._ws.send(data)
-            logger.debug(f"Sent: {data}")
+        self._out_queue.put_nowait(data)
+        self._queued_seq += 1
+
+    async def _writer_loop(self) -> None:
+        """Background task that drains the outbound queue to the WebSocket.
 
-    def _generate_ref(self) -> str:
+        Frames that are ready when the writer wakes up (up to _MAX_WRITE_BATCH)
+        are written back to back in one pass, so bursts of small messages cost
+        a single task wakeup instead of one lock round-trip per message. A
+        ``None`` entry stops the loop once the frames queued before it have
+        been written.
+        """
+        if not self._ws or self._out_queue is None:
+            return
+
+        ws = self._ws
+        queue = self._out_queue
+
+        try:
+            while True:
+                batch = [await queue.get()]
+                while len(batch) < _MAX_WRITE_BATCH:
+                    try:
+                        batch.append(queue.get_nowait())
+                    except asyncio.QueueEmpty:
+                        break
+
+                debug = logger.isEnabledFor(logging.DEBUG)
+                for data in batch:
+                    if data is None:
+                        return
+                    await ws.send(data)
+                    self._written_seq += 1
+                    if debug:
+                        logger.debug("Sent: %s", data)
+
+                self._release_flush_waiters()
+        except websockets.ConnectionClosed:
+            logger.info("WebSocket connection closed")
+            self._connected = False
+        except Exception as e:
+            logger.error("Error in writer loop: %s", e)
+            self._connected = False
+        finally:
+            self._release_flush_waiters()
+            while self._flush_waiters:
+                _, future = self._flush_waiters.popleft()
+                if not future.done():
+                    future.set_exception(DisconnectedError())
+
+    def _release_flush_waiters(self) -> None:
+        """Resolves flush() calls whose frames have all been written."""
+        waiters = self._flush_waiters
+        while waiters and waiters[0][0] <= self._written_seq:
+            _, future = waiters.popleft()
+            if not future.done():
+                future.set_result(None)
+
+    def _generate_ref(self) -> int:
         """Generates a unique message reference."""
         self._ref_counter += 1
-        return str(self._ref_counter)
+        return self._ref_counter
+
+    def _find_reply(self, ref: str) -> Optional[asyncio.Future[PhoenixReply]]:
+        """Looks up the future waiting for the reply with the given ref."""
+        try:
+            n = int(ref)
+        except ValueError:
+            return None
+
+        slot = n & _REPLY_MASK
+        if self._reply_refs[slot] == n and self._reply_futures[slot] is not None:
+            return self._reply_futures[slot]
+        return self._overflow_replies.get(n)
 
     async def _receive_loop(self) -> None:
         """Background task for receiving messages."""
@@ -258,23 +483,43 @@ class PhoenixSocket:
                     break
 
                 try:
-                    message = PhoenixMessage.from_json(data)
-                    logger.debug(f"Received: {data}")
+                    if len(data) > _LARGE_FRAME_BYTES:
+                        message = PhoenixMessage.from_dict(await self._parse_large_frame(data))
+                    else:
+                        message = PhoenixMessage.from_json(data)
+                    if logger.isEnabledFor(logging.DEBUG):
+                        logger.debug("Received: %s", data)
                     await self._handle_message(message)
-                except json.JSONDecodeError as e:
-                    logger.warning(f"Failed to parse message: {e}")
+                except orjson.JSONDecodeError as e:
+                    logger.warning("Failed to parse message: %s", e)
+
+            # Iteration ends without an exception when the server closes cleanly
+            self._connected = False
         except websockets.ConnectionClosed:
             logger.info("WebSocket connection closed")
             self._connected = False
         except Exception as e:
-            logger.error(f"Error in receive loop: {e}")
+            logger.error("Error in receive loop: %s", e)
             self._connected = False
 
+    async def _parse_large_frame(self, data: Union[str, bytes]) -> Any:
+        """Decodes a large frame on the parse executor instead of the event loop."""
+        if self._parse_executor is None:
+            self._parse_executor = ThreadPoolExecutor(
+                max_workers=2, thread_name_prefix="sensocto-parse"
+            )
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._parse_executor, orjson.loads, data)
+
     async def _handle_message(self, message: PhoenixMessage) -> None:
         """Handles an incoming message."""
         # Handle reply
         if message.event == "phx_reply" and message.ref:
-            future = self._pending_replies.get(message.ref)
+            if message.ref == self._heartbeat_ref:
+                self._heartbeat_ref = None
+                return
+
+            future = self._find_reply(message.ref)
             if future and not future.done():
                 payload = message.payload or {}
                 reply = PhoenixReply(
@@ -285,28 +530,63 @@ class PhoenixSocket:
             return
 
         # Dispatch to event handlers
-        key = f"{message.topic}:{message.event}"
-        handlers = self._event_handlers.get(key, [])
+        handlers = self._event_handlers.get((message.topic, message.event))
+        if handlers is None:
+            return
+
+        if not isinstance(handlers, list):
+            try:
+                handlers(message.payload)
+            except Exception as e:
+                logger.error(
+                    "Error in event handler for %s:%s: %s", message.topic, message.event, e
+                )
+            return
+
         for handler in handlers:
             try:
                 handler(message.payload)
             except Exception as e:
-                logger.error(f"Error in event handler for {key}: {e}")
+                logger.error(
+                    "Error in event handler for %s:%s: %s", message.topic, message.event, e
+                )
 
     async def _heartbeat_loop(self) -> None:
-        """Background task for sending heartbeats."""
+        """
+        Background task for sending heartbeats.
+
+        Beats are scheduled on a fixed grid from the loop clock, so time spent
+        sending does not push later beats back. The wait ends early when
+        disconnect() sets the shutdown event. If the previous heartbeat has not
+        been acknowledged when the next one is due, the connection is treated
+        as dead and closed.
+        """
+        if self._shutdown is None:
+            return
+
+        loop = asyncio.get_running_loop()
+        next_beat = loop.time() + self._heartbeat_interval
+
         while self._connected:
-            await asyncio.sleep(self._heartbeat_interval)
+            try:
+                await asyncio.wait_for(
+                    self._shutdown.wait(), timeout=max(0.0, next_beat - loop.time())
+                )
+                return
+            except asyncio.TimeoutError:
+                pass
+            next_beat += self._heartbeat_interval
 
             if self._connected:
+                if self._heartbeat_ref is not None and self._ws:
+                    logger.warning("Heartbeat timed out, closing connection")
+                    self._heartbeat_ref = None
+                    self._connected = False
+                    await self._ws.close()
+                    return
+
                 try:
-                    ref = self._generate_ref()
-                    message = PhoenixMessage(
-                        topic="phoenix",
-                        event="heartbeat",
-                        payload={},
-                        ref=ref,
-                    )
-                    await self._send_raw(message.to_json())
+                    self._heartbeat_ref = str(self._generate_ref())
+                    self._send_raw(self._encode("phoenix", "heartbeat", {}, self._heartbeat_ref))
                 except Exception as e:
-                    logger.warning(f"Failed to send heartbeat: {e}")
+                    logger.warning("Failed to send heartbeat: %s", e)
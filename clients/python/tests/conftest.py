@@ -0,0 +1,88 @@
+"""Shared fixtures: a PhoenixSocket connected to an in-memory fake WebSocket."""
+
+import asyncio
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+import orjson
+import pytest
+import websockets
+
+import sensocto.socket
+from sensocto.socket import PhoenixSocket
+
+
+class FakeWebSocket:
+    """
+    Stands in for a websockets client connection.
+
+    Frames passed to send() are recorded in ``sent``. Sends wait while ``gate``
+    is cleared and raise ConnectionClosed once the connection is closed. Frames
+    for the client are injected with reply() or receive().
+    """
+
+    def __init__(self) -> None:
+        self.sent: List[str] = []
+        self.gate = asyncio.Event()
+        self.gate.set()
+        self.closed = False
+        self._inbox: asyncio.Queue[Optional[str]] = asyncio.Queue()
+
+    @property
+    def sent_messages(self) -> List[Dict[str, Any]]:
+        return [orjson.loads(frame) for frame in self.sent]
+
+    async def send(self, data: str) -> None:
+        await self.gate.wait()
+        if self.closed:
+            raise websockets.ConnectionClosed(None, None)
+        self.sent.append(data)
+        message = orjson.loads(data)
+        if message["event"] in ("phx_join", "phx_leave"):
+            self.reply(message["topic"], message["ref"], {})
+
+    async def close(self) -> None:
+        self.closed = True
+        self._inbox.put_nowait(None)
+
+    def receive(self, message: Dict[str, Any]) -> None:
+        self._inbox.put_nowait(orjson.dumps(message).decode())
+
+    def reply(self, topic: str, ref: str, response: Any, status: str = "ok") -> None:
+        self.receive(
+            {
+                "topic": topic,
+                "event": "phx_reply",
+                "ref": ref,
+                "payload": {"status": status, "response": response},
+            }
+        )
+
+    def __aiter__(self) -> AsyncIterator[str]:
+        return self._frames()
+
+    async def _frames(self) -> AsyncIterator[str]:
+        while True:
+            frame = await self._inbox.get()
+            if frame is None:
+                return
+            yield frame
+
+
+@pytest.fixture
+async def fake_ws(monkeypatch: pytest.MonkeyPatch) -> FakeWebSocket:
+    ws = FakeWebSocket()
+
+    async def connect(url: str, **kwargs: Any) -> FakeWebSocket:
+        return ws
+
+    monkeypatch.setattr(sensocto.socket.websockets, "connect", connect)
+    return ws
+
+
+@pytest.fixture
+async def socket(fake_ws: FakeWebSocket) -> AsyncIterator[PhoenixSocket]:
+    phoenix = PhoenixSocket("ws://sensocto.test/socket/websocket")
+    await phoenix.connect()
+    yield phoenix
+    fake_ws.gate.set()
+    await phoenix.disconnect()
@@ -0,0 +1,75 @@
+"""Tests for SensorStream's credit window and batching."""
+
+import asyncio
+from typing import AsyncIterator
+
+import pytest
+
+import sensocto.socket
+from sensocto.config import SensorConfig
+from sensocto.errors import DisconnectedError
+from sensocto.sensor import _MAX_PENDING_FRAMES, SensorStream
+from sensocto.socket import PhoenixSocket
+
+from .conftest import FakeWebSocket
+
+TOPIC = "sensocto:sensor:test-sensor"
+
+
+@pytest.fixture
+async def stream(socket: PhoenixSocket) -> AsyncIterator[SensorStream]:
+    sensor = SensorStream(socket, TOPIC, "test-sensor", SensorConfig(sensor_name="Test"))
+    await sensor.join({})
+    yield sensor
+
+
+async def test_blocked_send_measurement_is_woken_on_disconnect(
+    monkeypatch: pytest.MonkeyPatch,
+    socket: PhoenixSocket,
+    stream: SensorStream,
+    fake_ws: FakeWebSocket,
+) -> None:
+    monkeypatch.setattr(sensocto.socket, "_DRAIN_TIMEOUT", 0.05)
+    fake_ws.gate.clear()
+
+    async def produce() -> None:
+        for i in range(_MAX_PENDING_FRAMES * 2):
+            await stream.send_measurement("hr", i)
+
+    producer = asyncio.create_task(produce())
+    await asyncio.sleep(0.01)
+    assert not producer.done()
+    assert socket.pending_frames >= _MAX_PENDING_FRAMES
+
+    await socket.disconnect()
+
+    with pytest.raises(DisconnectedError):
+        await asyncio.wait_for(producer, timeout=1)
+
+
+async def test_new_batch_window_counts_from_first_buffered_measurement(
+    stream: SensorStream, fake_ws: FakeWebSocket
+) -> None:
+    def set_window(window_ms: int) -> None:
+        fake_ws.receive(
+            {
+                "topic": TOPIC,
+                "event": "backpressure_config",
+                "ref": None,
+                "payload": {"recommended_batch_window": window_ms, "recommended_batch_size": 50},
+            }
+        )
+
+    def batches() -> int:
+        return sum(m["event"] == "measurements_batch" for m in fake_ws.sent_messages)
+
+    set_window(1000)
+    await asyncio.sleep(0.01)
+    await stream.add_to_batch("hr", 1)
+    await asyncio.sleep(0.1)
+    assert batches() == 0
+
+    # The measurement has already waited longer than the new window
+    set_window(100)
+    await asyncio.sleep(0.03)
+    assert batches() == 1
@@ -0,0 +1,124 @@
+"""Tests for PhoenixSocket's outbound queue, writer task and flush()."""
+
+import asyncio
+
+import pytest
+
+from sensocto.errors import DisconnectedError, TimeoutError
+from sensocto.socket import _REPLY_MASK, _REPLY_SLOTS, PhoenixSocket
+
+from .conftest import FakeWebSocket
+
+
+async def test_frames_are_written_in_fifo_order(
+    socket: PhoenixSocket, fake_ws: FakeWebSocket
+) -> None:
+    for i in range(600):
+        socket.send_nowait("sensor:1", "measurement", {"seq": i})
+    await socket.flush()
+
+    assert [m["payload"]["seq"] for m in fake_ws.sent_messages] == list(range(600))
+    assert socket.pending_frames == 0
+
+
+async def test_flush_waits_for_frames_queued_before_it(
+    socket: PhoenixSocket, fake_ws: FakeWebSocket
+) -> None:
+    fake_ws.gate.clear()
+    for i in range(3):
+        socket.send_nowait("sensor:1", "measurement", {"seq": i})
+
+    flush = asyncio.create_task(socket.flush())
+    await asyncio.sleep(0.01)
+    assert not flush.done()
+    assert fake_ws.sent == []
+
+    # Frames queued after flush() started are not waited for
+    socket.send_nowait("sensor:1", "measurement", {"seq": 3})
+    fake_ws.gate.set()
+    await asyncio.wait_for(flush, timeout=1)
+
+    assert [m["payload"]["seq"] for m in fake_ws.sent_messages[:3]] == [0, 1, 2]
+
+
+async def test_flush_raises_disconnected_after_connection_closes(
+    socket: PhoenixSocket, fake_ws: FakeWebSocket
+) -> None:
+    await fake_ws.close()
+    socket.send_nowait("sensor:1", "measurement", {"seq": 0})
+
+    with pytest.raises(DisconnectedError):
+        await asyncio.wait_for(socket.flush(), timeout=1)
+
+    # The writer has stopped, so later flushes fail straight away
+    with pytest.raises(DisconnectedError):
+        await asyncio.wait_for(socket.flush(), timeout=1)
+
+
+async def test_disconnect_drains_queued_frames(
+    socket: PhoenixSocket, fake_ws: FakeWebSocket
+) -> None:
+    fake_ws.gate.clear()
+    for i in range(3):
+        socket.send_nowait("sensor:1", "measurement", {"seq": i})
+
+    disconnect = asyncio.create_task(socket.disconnect())
+    await asyncio.sleep(0.01)
+    fake_ws.gate.set()
+    await asyncio.wait_for(disconnect, timeout=1)
+
+    assert [m["payload"]["seq"] for m in fake_ws.sent_messages] == [0, 1, 2]
+
+
+async def test_stale_reply_for_recycled_slot_is_ignored(
+    socket: PhoenixSocket, fake_ws: FakeWebSocket
+) -> None:
+    with pytest.raises(TimeoutError):
+        await socket.send("room:1", "ping", {}, timeout=0.01)
+    stale_ref = fake_ws.sent_messages[-1]["ref"]
+
+    # The next request that maps to the timed-out request's slot reuses it
+    socket._ref_counter = int(stale_ref) + _REPLY_SLOTS - 1
+    request = asyncio.create_task(socket.send("room:1", "ping", {}, timeout=1))
+    await asyncio.sleep(0.01)
+    ref = fake_ws.sent_messages[-1]["ref"]
+    assert int(ref) & _REPLY_MASK == int(stale_ref) & _REPLY_MASK
+
+    fake_ws.reply("room:1", stale_ref, {"from": "stale"})
+    await asyncio.sleep(0.01)
+    assert not request.done()
+
+    fake_ws.reply("room:1", ref, {"from": "current"})
+    reply = await request
+    assert reply.response == {"from": "current"}
+
+
+async def test_pending_slot_is_not_taken_over_by_a_newer_ref(
+    socket: PhoenixSocket, fake_ws: FakeWebSocket
+) -> None:
+    older = asyncio.create_task(socket.send("room:1", "ping", {}, timeout=1))
+    await asyncio.sleep(0.01)
+    older_ref = fake_ws.sent_messages[-1]["ref"]
+
+    # Wrap around onto the still-pending slot; the newer request overflows
+    socket._ref_counter = int(older_ref) + _REPLY_SLOTS - 1
+    newer = asyncio.create_task(socket.send("room:1", "ping", {}, timeout=1))
+    await asyncio.sleep(0.01)
+    newer_ref = fake_ws.sent_messages[-1]["ref"]
+
+    fake_ws.reply("room:1", newer_ref, {"from": "newer"})
+    assert (await newer).response == {"from": "newer"}
+    assert not older.done()
+
+    fake_ws.reply("room:1", older_ref, {"from": "older"})
+    assert (await older).response == {"from": "older"}
+
+
+async def test_leaving_a_channel_drops_its_cached_prefixes(socket: PhoenixSocket) -> None:
+    await socket.send("call:1", "phx_join", {})
+    socket.send_nowait("call:1", "media_event", {})
+    socket.send_nowait("sensor:1", "measurement", {})
+    await socket.send("call:1", "phx_leave", {})
+
+    assert [key for key in socket._envelope_prefixes if key[0] == "call:1"] == []
+    assert ("sensor:1", "measurement") in socket._envelope_prefixes
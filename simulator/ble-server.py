@@ -1,17 +1,30 @@
+import struct
+
 import objc
+from dispatch import dispatch_async, dispatch_queue_create
 from Foundation import NSData
 from CoreBluetooth import (
-    CBPeripheralManager, CBMutableCharacteristic, CBMutableService,
+    CBPeripheralManager, CBMutableCharacteristic, CBMutableService, CBUUID,
     CBCharacteristicPropertyRead, CBAttributePermissionsReadable
 )
 
+# Pressure (0x2A6D) is a little-endian uint32 in units of 0.1 Pa
+PRESSURE_FORMAT = struct.Struct("<I")
+
 class BLEPeripheral:
     def __init__(self):
+        # Deliver BLE callbacks on a private serial queue instead of the main queue
+        self.queue = dispatch_queue_create(b"sensocto.ble", None)
+
         # Initialize the peripheral manager
-        self.manager = CBPeripheralManager.alloc().initWithDelegate_queue_(self, None)
+        self.manager = CBPeripheralManager.alloc().initWithDelegate_queue_(self, self.queue)
         self.service = None
         self.characteristics = []  # Keep track of characteristics
 
+        # Parse the UUIDs once instead of passing strings for CoreBluetooth to re-parse
+        self.pressure_uuid = CBUUID.UUIDWithString_("2A6D")  # Pressure characteristic
+        self.service_uuid = CBUUID.UUIDWithString_("181A")  # Environmental sensing service
+
     def peripheralManagerDidUpdateState_(self, manager):
         if manager.state() == 5:  # Powered On
             print("Peripheral Manager powered on.")
@@ -20,7 +33,7 @@ class BLEPeripheral:
     def setup_service(self):
         # Create a pressure characteristic
         characteristic = CBMutableCharacteristic.alloc().initWithType_properties_value_permissions_(
-            "00002A6D-0000-1000-8000-00805F9B34FB",  # Pressure characteristic UUID
+            self.pressure_uuid,
             CBCharacteristicPropertyRead,
             None,  # No initial value
             CBAttributePermissionsReadable,
@@ -29,7 +42,7 @@ class BLEPeripheral:
 
         # Create the service and retain it by setting it in the instance
         self.service = CBMutableService.alloc().initWithType_primary_(
-            "0000181A-0000-1000-8000-00805F9B34FB",  # Environmental sensing service UUID
+            self.service_uuid,
             True,  # Primary service
         )
         self.service.setCharacteristics_(self.characteristics)
@@ -53,20 +66,23 @@ class BLEPeripheral:
         else:
             print("Advertising started.")
 
-    def convert_string_to_nsdata(self, value):
-        """Helper method to convert a string to NSData."""
-        return NSData.dataWithBytes_length_(value.encode('utf-8'), len(value))
+    def update_pressure_value(self, pressure_pa):
+        """Method to update pressure value (in Pa) of characteristic."""
+        ns_data = NSData.dataWithBytes_length_(
+            PRESSURE_FORMAT.pack(int(pressure_pa * 10)), PRESSURE_FORMAT.size
+        )
+
+        def set_value():
+            if self.characteristics:
+                self.characteristics[0].setValue_(ns_data)  # Update the first characteristic
 
-    def update_pressure_value(self, pressure_value):
-        """Method to update pressure value of characteristic."""
-        ns_data = self.convert_string_to_nsdata(pressure_value)
-        if self.characteristics:
-            self.characteristics[0].setValue_(ns_data)  # Update the first characteristic
+        # Characteristics are created on the BLE queue, so update them there too
+        dispatch_async(self.queue, set_value)
 
 if __name__ == "__main__":
     from PyObjCTools.AppHelper import runConsoleEventLoop
 
     print("Starting BLE Peripheral...")
     peripheral = BLEPeripheral()
-    peripheral.update_pressure_value("Simulated Pressure: 1013 hPa")
+    peripheral.update_pressure_value(101300)  # 1013 hPa
     runConsoleEventLoop()
@@ -4,19 +4,48 @@ import time
 import logging
 import random
 import websockets  # Correct library name
-from collections import deque
-from typing import Callable, Optional, Dict, Any, List
+from typing import Callable, Optional, Dict, Any, List, Tuple
+
+try:
+    import orjson
+
+    # Same leniency as json for numpy scalars and non-string keys. Frames stay
+    # text (str): Phoenix's JSON serializer expects text, not binary, frames.
+    _ORJSON_OPTIONS = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+
+    def dumps(obj) -> str:
+        return orjson.dumps(obj, option=_ORJSON_OPTIONS).decode()
+
+    loads = orjson.loads
+except ImportError:  # orjson is optional
+    dumps = json.dumps
+    loads = json.loads
 
 logging.basicConfig(level=logging.INFO)
 
+# Most frames the writer sends per wakeup before yielding to other tasks
+MAX_WRITE_BATCH = 256
+
+
+def run(main):
+    """Run the main coroutine on uvloop when it is installed, else on asyncio's loop."""
+    try:
+        import uvloop  # optional, faster event loop
+    except ImportError:
+        return asyncio.run(main)
+    return uvloop.run(main)
+
 
 class BackpressureConfig:
     """Stores backpressure configuration received from the server."""
 
+    __slots__ = ("attention_level", "batch_window_ms", "batch_size", "paused", "timestamp")
+
     def __init__(self):
         self.attention_level = "none"
         self.batch_window_ms = 5000  # Default: 5 seconds
         self.batch_size = 20  # Default: large batches
+        self.paused = False  # Set under critical load or memory pressure
         self.timestamp = 0
 
     def update(self, config: dict):
@@ -24,13 +53,25 @@ class BackpressureConfig:
         self.attention_level = config.get("attention_level", self.attention_level)
         self.batch_window_ms = config.get("recommended_batch_window", self.batch_window_ms)
         self.batch_size = config.get("recommended_batch_size", self.batch_size)
+        self.paused = config.get("paused", self.paused)
         self.timestamp = config.get("timestamp", time.time() * 1000)
         logging.info(
             f"Backpressure config updated: level={self.attention_level}, "
-            f"window={self.batch_window_ms}ms, batch_size={self.batch_size}"
+            f"window={self.batch_window_ms}ms, batch_size={self.batch_size}, paused={self.paused}"
         )
 
 
+class TopicState:
+    """Batching state for one topic: queued payloads, its config and flush timer."""
+
+    __slots__ = ("queue", "config", "timer")
+
+    def __init__(self, config: BackpressureConfig):
+        self.queue: List[dict] = []
+        self.config = config  # the same object get_backpressure_config() returns
+        self.timer: Optional[asyncio.TimerHandle] = None
+
+
 class PhoenixChannelClient:
     def __init__(self, socket_url, on_message_callback, on_connect_callback=None, on_disconnect_callback=None):
         self.socket_url = socket_url
@@ -39,26 +80,37 @@ class PhoenixChannelClient:
         self.on_disconnect_callback = on_disconnect_callback
         self.channels = {}
         self.ws = None
-        self.lock = asyncio.Lock()
         self.connected = False
         self.receiving_task = None  # Task for receiving messages
+        # Producers enqueue encoded frames; a single writer task sends them in order
+        self._out_q: asyncio.Queue = asyncio.Queue()
+        self._writer_task = None
         self.reconnect_delay = 2 # Default reconnect delay
 
+        # Encoded '{"topic":...,"event":...,"payload":' prefix per (topic, event)
+        self._frame_prefixes: Dict[Tuple[str, str], str] = {}
+        self._ref = 0
+
         # Backpressure support
         self.backpressure_configs: Dict[str, BackpressureConfig] = {}
-        self.message_queues: Dict[str, deque] = {}
-        self.batch_tasks: Dict[str, asyncio.Task] = {}
+        # Queued measurement payloads (sent as-is as the batch rows) and the pending
+        # flush timer per topic; timers use the event loop's own timer heap
+        self.topic_states: Dict[str, TopicState] = {}
         self.on_backpressure_callback: Optional[Callable] = None
 
     async def connect(self):
         while True:
             try:
-                self.ws = await websockets.connect(self.socket_url)
+                # Sensor frames are small and frequent; per-message deflate costs
+                # zlib CPU on every push for little size reduction
+                self.ws = await websockets.connect(self.socket_url, compression=None)
                 logging.info("WebSocket connection opened")
                 self.connected = True
                 if self.on_connect_callback:
                     await self.on_connect_callback()
 
+                if self._writer_task is None or self._writer_task.done():
+                    self._writer_task = asyncio.create_task(self._writer())
                 await self._join_all_channels()
                 self.receiving_task = asyncio.create_task(self._receive_messages())
                 break  # Connection successful, exit loop
@@ -84,11 +136,49 @@ class PhoenixChannelClient:
         for topic, params in list(self.channels.items()):
              await self._join_channel(topic, params)
 
+    async def _writer(self):
+        """Send queued frames in order; the only coroutine that writes to ws.
+
+        Every frame already queued when the writer wakes up (up to
+        MAX_WRITE_BATCH) is sent back to back, so a burst costs one wakeup.
+        Phoenix has no multi-message envelope, so each frame stays its own message.
+
+        The first failed send marks the client disconnected and stops the writer:
+        frames still queued are dropped, as push() drops frames while disconnected,
+        and connect() starts a new writer.
+        """
+        while True:
+            frames = [await self._out_q.get()]
+            while len(frames) < MAX_WRITE_BATCH and not self._out_q.empty():
+                frames.append(self._out_q.get_nowait())
+            sent = 0
+            try:
+                for frame in frames:
+                    await self.ws.send(frame)
+                    sent += 1
+            except Exception as e:
+                self.connected = False
+                dropped = len(frames) - sent + self._drop_queued_frames()
+                logging.error(f"Error sending frame, dropping {dropped} unsent frames: {e}")
+                return
+            finally:
+                for _ in frames:
+                    self._out_q.task_done()
+
+    def _drop_queued_frames(self) -> int:
+        """Discard every frame waiting for the writer; returns how many there were."""
+        dropped = 0
+        while not self._out_q.empty():
+            self._out_q.get_nowait()
+            self._out_q.task_done()
+            dropped += 1
+        return dropped
+
     async def _receive_messages(self):
         try:
             async for message in self.ws:
                 try:
-                    data = json.loads(message)
+                    data = loads(message)
                     topic = data.get("topic")
                     event = data.get("event")
                     payload = data.get("payload")
@@ -99,7 +189,7 @@ class PhoenixChannelClient:
 
                     if topic and event:
                         self.on_message_callback(topic, event, payload)
-                except json.JSONDecodeError as e:
+                except json.JSONDecodeError as e:  # also raised by orjson
                     logging.error(f"Error decoding JSON: {message}, {e}")
         except Exception as e:
             logging.error(f"Error receiving messages, closing connection: {e}")
@@ -108,6 +198,22 @@ class PhoenixChannelClient:
                 await self.on_disconnect_callback()
             await self.close()
 
+    def _next_ref(self) -> str:
+        self._ref += 1
+        return str(self._ref)
+
+    def _encode_frame(self, topic: str, event: str, payload) -> str:
+        """Encode a Phoenix frame, serializing topic and event once per pair."""
+        return self._encode_raw_frame(topic, event, dumps(payload))
+
+    def _encode_raw_frame(self, topic: str, event: str, raw_payload: str) -> str:
+        """Wrap an already JSON-encoded payload in a Phoenix frame."""
+        prefix = self._frame_prefixes.get((topic, event))
+        if prefix is None:
+            prefix = f'{{"topic":{dumps(topic)},"event":{dumps(event)},"payload":'
+            self._frame_prefixes[(topic, event)] = prefix
+        return f'{prefix}{raw_payload},"ref":"{self._next_ref()}"}}'
+
     def _handle_backpressure_config(self, topic: str, payload: dict):
         """Handle backpressure configuration updates from server."""
         if topic not in self.backpressure_configs:
@@ -129,114 +235,116 @@ class PhoenixChannelClient:
         self.on_backpressure_callback = callback
 
     async def _join_channel(self, topic, params):
-        try:
-            async with self.lock:
-                logging.info(f"Joining channel: {topic}")
-                payload = {"topic": topic, "event": "phx_join", "payload": params, "ref": str(time.time())}
-                await self.ws.send(json.dumps(payload))
-        except Exception as e:
-            logging.error(f"Error joining channel {topic}: {e}")
+        logging.info(f"Joining channel: {topic}")
+        self._out_q.put_nowait(self._encode_frame(topic, "phx_join", params))
 
+    # Channel state is only touched from the event loop thread and these methods
+    # never await mid-update, so no lock is needed.
     async def subscribe(self, topic, params):
-        async with self.lock:
-             if topic not in self.channels:
-                self.channels[topic] = params
+        if topic not in self.channels:
+            self.channels[topic] = params
+            # Channels added after connect() join right away on the open socket
+            if self.connected:
+                await self._join_channel(topic, params)
 
 
     async def unsubscribe(self, topic):
-        async with self.lock:
-            if topic in self.channels:
-                logging.info(f"Unsubscribing from channel: {topic}")
-                del self.channels[topic]
-                payload = {"topic": topic, "event": "phx_leave", "payload": {}, "ref": str(time.time())}
-                if self.connected:
-                  await self.ws.send(json.dumps(payload))
+        if topic in self.channels:
+            logging.info(f"Unsubscribing from channel: {topic}")
+            del self.channels[topic]
+            if self.connected:
+                self._out_q.put_nowait(self._encode_frame(topic, "phx_leave", {}))
 
 
     async def push(self, topic, event, payload):
-         async with self.lock:
-            if self.ws and self.connected and not self.ws.closed:
-                try:
-                   logging.info(f"Pushing event: {event} on topic: {topic}, with payload: {payload}")
-                   push_payload = {"topic": topic, "event": event, "payload": payload, "ref": str(time.time())}
-                   await self.ws.send(json.dumps(push_payload))
-                except Exception as e:
-                    logging.error(f"Error pushing message {event} on {topic}: {e}")
-                    self.connected = False
+        if self.ws and self.connected:
+            if logging.getLogger().isEnabledFor(logging.DEBUG):
+                logging.debug("Pushing event: %s on topic: %s, with payload: %s", event, topic, payload)
+            self._out_q.put_nowait(self._encode_frame(topic, event, payload))
+
+    async def push_raw(self, topic: str, event: str, raw_payload: str):
+        """Push a payload that is already JSON-encoded text, skipping serialization."""
+        if self.ws and self.connected:
+            if logging.getLogger().isEnabledFor(logging.DEBUG):
+                logging.debug("Pushing event: %s on topic: %s, with payload: %s", event, topic, raw_payload)
+            self._out_q.put_nowait(self._encode_raw_frame(topic, event, raw_payload))
 
     async def push_with_backpressure(self, topic: str, event: str, payload: dict):
         """
         Push a message respecting backpressure configuration.
         Messages are queued and sent in batches according to server recommendations.
+        While the server has paused the topic, messages are dropped rather than queued.
         """
-        # Initialize queue for this topic if needed
-        if topic not in self.message_queues:
-            self.message_queues[topic] = deque()
+        # One lookup gives the queue, config and timer for this topic
+        state = self.topic_states.get(topic) or self._init_topic(topic)
+        if state.config.paused:
+            return
 
         # Add message to queue
-        self.message_queues[topic].append({
-            "event": event,
-            "payload": payload,
-            "queued_at": time.time() * 1000
-        })
-
-        # Get backpressure config
-        config = self.get_backpressure_config(topic)
+        state.queue.append(payload)
 
         # Check if we should flush immediately (batch size reached)
-        if len(self.message_queues[topic]) >= config.batch_size:
-            await self._flush_queue(topic)
-        else:
+        if len(state.queue) >= state.config.batch_size:
+            self._flush_state(topic, state)
+        elif state.timer is None:
             # Start batch timer if not already running
-            self._ensure_batch_timer(topic)
+            state.timer = asyncio.get_running_loop().call_later(
+                state.config.batch_window_ms / 1000.0, self._on_batch_timer, topic
+            )
 
-    def _ensure_batch_timer(self, topic: str):
-        """Ensure a batch timer is running for the topic."""
-        if topic in self.batch_tasks and not self.batch_tasks[topic].done():
-            return  # Timer already running
+    def _init_topic(self, topic: str) -> TopicState:
+        """Create the batching state for a topic on its first push."""
+        state = self.topic_states[topic] = TopicState(self.get_backpressure_config(topic))
+        return state
 
-        config = self.get_backpressure_config(topic)
-        self.batch_tasks[topic] = asyncio.create_task(
-            self._batch_timer(topic, config.batch_window_ms)
-        )
-
-    async def _batch_timer(self, topic: str, window_ms: int):
-        """Timer that flushes the queue after the batch window expires."""
-        await asyncio.sleep(window_ms / 1000.0)
-        if topic in self.message_queues and len(self.message_queues[topic]) > 0:
-            await self._flush_queue(topic)
+    def _on_batch_timer(self, topic: str):
+        """Flush the queue once the batch window expires."""
+        state = self.topic_states[topic]
+        state.timer = None
+        self._flush_state(topic, state)
 
     async def _flush_queue(self, topic: str):
         """Flush all queued messages for a topic as a batch."""
-        if topic not in self.message_queues:
+        state = self.topic_states.get(topic)
+        if state is not None:
+            self._flush_state(topic, state)
+
+    def _flush_state(self, topic: str, state: TopicState):
+        """Queue the topic's pending messages for the writer and cancel its timer."""
+        if state.timer is not None:
+            state.timer.cancel()
+            state.timer = None
+
+        messages = state.queue
+        if len(messages) == 0:
             return
 
-        queue = self.message_queues[topic]
-        if len(queue) == 0:
-            return
+        # Swap in an empty queue; the old list is sent as-is
+        state.queue = []
 
-        # Collect all messages
-        messages = []
-        while len(queue) > 0:
-            msg = queue.popleft()
-            messages.append(msg["payload"])
-
-        # Send as batch or individual based on count
+        # Send as batch or individual based on count, encoding the frame in one call
         if len(messages) == 1:
-            await self.push(topic, "measurement", messages[0])
+            event, payload = "measurement", messages[0]
         else:
-            await self.push(topic, "measurements_batch", messages)
-            logging.info(f"Flushed batch of {len(messages)} messages for {topic}")
+            event, payload = "measurements_batch", messages
+
+        if not (self.ws and self.connected):
+            return
+        self._out_q.put_nowait(self._encode_frame(topic, event, payload))
+
+        if len(messages) > 1:
+            logging.debug("Flushed batch of %d messages for %s", len(messages), topic)
 
     async def close(self):
-        # Cancel all batch timers
-        for task in self.batch_tasks.values():
-            if not task.done():
-                task.cancel()
+        # Flush remaining queues; this also cancels their batch timers
+        for topic, state in self.topic_states.items():
+            self._flush_state(topic, state)
 
-        # Flush remaining queues
-        for topic in list(self.message_queues.keys()):
-            await self._flush_queue(topic)
+        # Let the writer send what is queued, then stop it
+        if self._writer_task and not self._writer_task.done():
+            if self.connected:
+                await self._out_q.join()
+            self._writer_task.cancel()
 
         if self.ws:
             await self.ws.close()
@@ -273,4 +381,4 @@ async def main():
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
\ No newline at end of file
+    run(main())
\ No newline at end of file
@@ -1,27 +1,115 @@
 # concurrent_runner.py
 import asyncio
+import importlib.util
 import logging
+import os
 import subprocess
 import shlex
 import argparse
 import re
 
+from python_phoenix_client import run
+
 logging.basicConfig(level=logging.INFO)
 
+SIMULATOR_SCRIPT = "sensocto-simulator.py"
+SHELL_OPERATORS = {"|", "||", "&", "&&", ";", ">", ">>", "<"}
+_simulator = None
+
+
+def load_simulator():
+    """Imports sensocto-simulator.py once so its sensors can run in this process."""
+    global _simulator
+    if _simulator is None:
+        path = os.path.join(os.path.dirname(os.path.abspath(__file__)), SIMULATOR_SCRIPT)
+        spec = importlib.util.spec_from_file_location("sensocto_simulator", path)
+        _simulator = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(_simulator)
+    return _simulator
+
+
+def simulator_argv(command):
+    """Returns the arguments of a plain sensocto-simulator.py command, else None."""
+    try:
+        argv = shlex.split(command)
+    except ValueError:
+        return None
+    if any(arg in SHELL_OPERATORS for arg in argv):
+        return None  # pipes, redirects, etc. still need a shell
+    for i, arg in enumerate(argv):
+        if os.path.basename(arg) == SIMULATOR_SCRIPT:
+            return argv[i + 1:]
+    return None
+
+
+async def connect_client(socket_url):
+    """Opens one Phoenix connection that simulated sensors multiplex their channels over."""
+    simulator = load_simulator()
+    client = simulator.PhoenixChannelClient(socket_url, simulator.handle_message)
+    logging.info(f"Connecting shared client to: {socket_url}")
+    await client.connect()
+    return client
+
+
+async def run_simulator(argv, clients):
+    """Runs one simulated sensor in this process instead of a new interpreter.
+
+    Phoenix sensors with the same socket_url share one connection from clients,
+    a dict of socket_url to the task that connects it.
+    """
+    simulator = load_simulator()
+    try:
+        args = simulator.build_parser().parse_args(argv)
+    except SystemExit:  # argparse already printed the error
+        logging.error(f"Invalid simulator arguments: {' '.join(argv)}")
+        return
+    logging.info(f"Running simulator in-process: {' '.join(argv)}")
+    try:
+        client = None
+        if args.mode == "phoenix":
+            if args.socket_url not in clients:
+                clients[args.socket_url] = asyncio.ensure_future(connect_client(args.socket_url))
+            client = await clients[args.socket_url]
+        if args.sensor_types:
+            await simulator.run_sensor_types(args, client)
+        else:
+            await simulator.run(args, client)
+    except Exception as e:
+        logging.error(f"Simulator failed ({' '.join(argv)}): {e}", exc_info=True)
+
+
+async def log_stream(stream, log):
+    """Logs each line of a subprocess stream as it is read."""
+    async for line in stream:
+        log(line.decode(errors="replace").rstrip())
+
 
 async def run_command(command):
     """Runs a shell command asynchronously."""
     logging.info(f"Running command: {command}")
-    process = await asyncio.create_subprocess_shell(
-        command,
-        stdout=asyncio.subprocess.PIPE,
-        stderr=asyncio.subprocess.PIPE
+    try:
+        argv = shlex.split(command)
+    except ValueError:
+        argv = None  # let the shell report the quoting error
+    if argv is None or any(arg in SHELL_OPERATORS for arg in argv):
+        process = await asyncio.create_subprocess_shell(
+            command,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE
+        )
+    else:
+        # No shell syntax, so exec the program directly and skip the /bin/sh process
+        process = await asyncio.create_subprocess_exec(
+            *argv,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE
+        )
+    # Log output line by line as it arrives instead of buffering it all until exit
+    await asyncio.gather(
+        log_stream(process.stdout, logging.info),
+        log_stream(process.stderr, logging.error),
+        process.wait(),
     )
-    stdout, stderr = await process.communicate()
-    if stdout:
-        logging.info(f"Command output:\n{stdout.decode()}")
-    if stderr:
-        logging.error(f"Command error output:\n{stderr.decode()}")
     if process.returncode != 0:
         logging.error(f"Command failed with exit code: {process.returncode}")
     else:
@@ -59,17 +147,24 @@ async def main():
         logging.error(f"Error: Configuration file not found at {config_file}")
         return
 
-    tasks = []
-
-    for command in commands:
-        if socket_url:
-            if "--socket_url" not in command:  # dont append if there is already a socket url
-                command += f' --socket_url {socket_url}'  # add it if it's missing
+    clients = {}
 
-        tasks.append(run_command(command))
+    # A TaskGroup keeps no results list and cancels the other commands as soon
+    # as one fails, instead of reporting the failure only when all have finished.
+    async with asyncio.TaskGroup() as tg:
+        for command in commands:
+            if socket_url:
+                if "--socket_url" not in command:  # dont append if there is already a socket url
+                    command += f' --socket_url {socket_url}'  # add it if it's missing
 
-    await asyncio.gather(*tasks)
+            # Simulator sensors share this process and event loop; anything else still
+            # runs as a shell command.
+            argv = simulator_argv(command)
+            if argv is not None:
+                tg.create_task(run_simulator(argv, clients))
+            else:
+                tg.create_task(run_command(command))
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
\ No newline at end of file
+    run(main())
\ No newline at end of file
@@ -3,12 +3,12 @@ from logging import lastResort
 import neurokit2 as nk
 
 import time
-import random
 import numpy as np
 import asyncio
 import logging
+import sys
 
-from python_phoenix_client import PhoenixChannelClient, BackpressureConfig
+from python_phoenix_client import PhoenixChannelClient, BackpressureConfig, run as run_loop
 import uuid
 import argparse
 
@@ -17,6 +17,30 @@ logging.basicConfig(level=logging.INFO)  # Set Logging Level
 # Global backpressure state for the simulator
 current_backpressure_config = None
 
+# stream_sensor_data sleeps and sends once per chunk of up to this many samples,
+# spanning at most this much sample time
+STREAM_CHUNK_SIZE = 32
+STREAM_CHUNK_MS = 100
+
+# CSV mode writes rows in blocks of this many lines through a buffer of this size
+CSV_WRITE_CHUNK = 8192
+CSV_BUFFER_SIZE = 1 << 20
+
+# neurokit2 signals are rounded to this many decimals: well below their noise, and
+# a rounded float64 prints in about half the JSON/CSV characters of a full one
+SIGNAL_DECIMALS = 6
+
+# Shared PCG64 generator; faster than the legacy global np.random state
+_RNG = np.random.default_rng()
+
+
+def _add_sine(out, phase, frequency, amplitude, scratch):
+    """Adds amplitude * sin(frequency * phase) to out in place, using scratch for the sine."""
+    np.multiply(phase, frequency, out=scratch)
+    np.sin(scratch, out=scratch)
+    scratch *= amplitude
+    out += scratch
+
 
 def generate_heart_rate(
     duration,
@@ -31,135 +55,136 @@ def generate_heart_rate(
     """Generates heart rate data with a tidal trend, sinusoidal variation, RSA, baseline drift, and random noise."""
     num_samples = int(duration * sampling_rate)
     time_points = np.linspace(0, duration, num_samples)
+    # Components are accumulated in place into one array, with a single scratch
+    # buffer, instead of allocating a temporary per term
+    phase = time_points * (2 * np.pi)
+    scratch = np.empty_like(phase)
+
+    # Random noise around the average
+    heart_rate_values = _RNG.standard_normal(num_samples)
+    heart_rate_values *= variability / 3
+    heart_rate_values += avg_heart_rate
 
     # Tidal trend (slow sinusoidal variation)
-    tidal_trend = np.sin(2 * np.pi * 0.01 * time_points) * tidal_amplitude
+    _add_sine(heart_rate_values, phase, 0.01, tidal_amplitude, scratch)
 
     # Respiratory Sinus Arrhythmia (RSA)
-    rsa_variation = np.sin(2 * np.pi * 0.25 * time_points) * rsa_amplitude
+    _add_sine(heart_rate_values, phase, 0.25, rsa_amplitude, scratch)
 
     # Baseline drift (very slow linear trend)
-    drift = drift_rate * time_points
+    np.multiply(time_points, drift_rate, out=scratch)
+    heart_rate_values += scratch
 
     # Sinusoidal variation
-    sinusoid = np.sin(2 * np.pi * 0.1 * time_points) * variability
-
-    # Random noise
-    noise = np.random.normal(0, variability / 3, num_samples)
-
-    heart_rate_values = (
-        avg_heart_rate + tidal_trend + rsa_variation + drift + sinusoid + noise
-    )
+    _add_sine(heart_rate_values, phase, 0.1, variability, scratch)
 
     # Simulate Random spikes:
-    for i in range(num_samples):
-        if np.random.rand() < spike_probability:
-            spike_value = np.random.uniform(-10, 10)
-            heart_rate_values[i] += spike_value
+    spikes = _RNG.random(num_samples) < spike_probability
+    heart_rate_values[spikes] += _RNG.uniform(-10, 10, np.count_nonzero(spikes))
 
-    heart_rate_values = np.clip(
-        heart_rate_values, 30, 220
+    np.clip(
+        heart_rate_values, 30, 220, out=heart_rate_values
     )  # Clip to a reasonable range
-    heart_rate_values = np.round(heart_rate_values, 0)
+    np.round(heart_rate_values, 0, out=heart_rate_values)
     return heart_rate_values
 
 
-def generate_sensor_data(
+def simulate_biosignal(
+    sensor_type,
     duration,
     sampling_rate,
-    sensor_type,
     heart_rate=None,
     respiratory_rate=None,
     scr_number=None,
     burst_number=None,
 ):
-    """Generates synthetic biosignal data based on sensor_type."""
+    """Runs the neurokit2 model for sensor_type and returns a float64 array rounded
+    to SIGNAL_DECIMALS.
+
+    The models draw fresh noise on every call, so each cycle and each sensor gets
+    its own signal. Returns None for sensor types that are not neurokit2 signals.
+    """
     if sensor_type == "ecg":
-        ecg = nk.ecg_simulate(
+        values = nk.ecg_simulate(
             duration=duration,
             sampling_rate=sampling_rate,
             heart_rate=heart_rate if heart_rate else 70,
         )
-        return [
-            {
-                "timestamp": int((time.time() + (i / sampling_rate)) * 1000),
-                "payload": float(value),
-            }
-            for i, value in enumerate(ecg)
-        ]
     elif sensor_type == "ppg":
-        ppg = nk.ppg_simulate(
+        values = nk.ppg_simulate(
             duration=duration,
             sampling_rate=sampling_rate,
             heart_rate=heart_rate if heart_rate else 70,
         )
-        return [
-            {
-                "timestamp": int((time.time() + (i / sampling_rate)) * 1000),
-                "payload": float(value),
-            }
-            for i, value in enumerate(ppg)
-        ]
 
     elif sensor_type == "rsp":
-        rsp = nk.rsp_simulate(
+        values = nk.rsp_simulate(
             duration=duration,
             sampling_rate=sampling_rate,
             respiratory_rate=respiratory_rate if respiratory_rate else 15,
         )
-        return [
-            {
-                "timestamp": int((time.time() + (i / sampling_rate)) * 1000),
-                "payload": float(value),
-            }
-            for i, value in enumerate(rsp)
-        ]
     elif sensor_type == "eda":
-        eda = nk.eda_simulate(
+        values = nk.eda_simulate(
             duration=duration,
             sampling_rate=sampling_rate,
             scr_number=scr_number if scr_number else 5,
         )
-        return [
-            {
-                "timestamp": int((time.time() + (i / sampling_rate)) * 1000),
-                "payload": float(value),
-            }
-            for i, value in enumerate(eda)
-        ]
     elif sensor_type == "emg":
-        emg = nk.emg_simulate(
+        values = nk.emg_simulate(
             duration=duration,
             sampling_rate=sampling_rate,
             burst_number=burst_number if burst_number else 5,
         )
-        return [
-            {
-                "timestamp": int((time.time() + (i / sampling_rate)) * 1000),
-                "payload": float(value),
-            }
-            for i, value in enumerate(emg)
-        ]
-    elif sensor_type == "heartrate":
-        hr_values = generate_heart_rate(
+    else:
+        return None
+
+    return np.round(np.asarray(values, dtype=np.float64), SIGNAL_DECIMALS)
+
+
+def generate_sensor_data(
+    duration,
+    sampling_rate,
+    sensor_type,
+    heart_rate=None,
+    respiratory_rate=None,
+    scr_number=None,
+    burst_number=None,
+):
+    """Generates synthetic biosignal data based on sensor_type.
+
+    Returns (timestamps, payloads) as NumPy arrays: int64 milliseconds, one
+    sample period apart starting now, and float64 sample values.
+    """
+    if sensor_type == "heartrate":
+        payloads = generate_heart_rate(
             duration, sampling_rate, heart_rate if heart_rate else 70
         )
-        return [
-            {
-                "timestamp": int((time.time() + (i / sampling_rate)) * 1000),
-                "payload": float(value),
-            }
-            for i, value in enumerate(hr_values)
-        ]
     else:
-        raise ValueError(f"Unsupported sensor type: {sensor_type}")
+        payloads = simulate_biosignal(
+            sensor_type,
+            duration,
+            sampling_rate,
+            heart_rate,
+            respiratory_rate,
+            scr_number,
+            burst_number,
+        )
+        if payloads is None:
+            raise ValueError(f"Unsupported sensor type: {sensor_type}")
+
+    timestamps = int(time.time() * 1000) + (
+        np.arange(len(payloads), dtype=np.int64) * 1000 // sampling_rate
+    )
+    return timestamps, payloads
 
 
 def time_delta(samples, delta, noise_range_percentage=1):
-    dt_list = [delta] * samples
-    noise_number = (delta) / 100 * noise_range_percentage
-    noise_range = (-noise_number, noise_number)
-    dt_list_noisy = [x + np.random.uniform(*noise_range) for x in dt_list]
+    """Returns constant and jittered (+/- noise_range_percentage) sample intervals as arrays."""
+    noise_number = delta / 100 * noise_range_percentage
+    dt_list = np.full(samples, delta, dtype=np.float64)
+    dt_list_noisy = _RNG.uniform(
+        delta - noise_number, delta + noise_number, size=samples
+    )
     return dt_list, dt_list_noisy
 
 
@@ -167,37 +192,67 @@ async def stream_sensor_data(client, sensor_id, events, channel, use_backpressur
     """
     Stream sensor data to the server.
 
+    Samples are paced in chunks of up to STREAM_CHUNK_SIZE samples spanning at most
+    STREAM_CHUNK_MS of sample time: the stream sleeps until the capture time of the
+    chunk's last sample on the simulated timeline and then sends the chunk, each
+    sample timestamped at its simulated capture time. That sample's delay carries
+    into the next chunk's deadline. Deadlines are absolute, so time spent sending
+    does not add up to drift over long runs.
+
     When use_backpressure=True (default), messages are queued and batched according
     to the server's backpressure recommendations. This reduces network overhead
     when users aren't actively viewing the sensor data.
 
-    When use_backpressure=False, messages are sent immediately (legacy behavior).
+    When use_backpressure=False, each chunk is sent immediately as one measurement
+    or measurements_batch frame.
     """
-    for event in events:
-        try:
+    loop = asyncio.get_running_loop()
+    start = loop.time()
+    start_ms = time.time_ns() // 1_000_000
+    offset_ms = 0.0  # position on the simulated timeline
+    index = 0
+    while index < len(events):
+        chunk_start_ms = offset_ms
+        rows = []
+        while index < len(events) and len(rows) < STREAM_CHUNK_SIZE:
+            if rows and offset_ms - chunk_start_ms >= STREAM_CHUNK_MS:
+                break
+            event = events[index]
+            index += 1
             if not "payload" in event:
                 event["payload"] = event["value"]
 
-            payload = {
-                "timestamp": int(time.time() * 1000),
-                "payload": event["payload"],
-                "attribute_id": event["sensor_type"],
-            }
+            rows.append(
+                {
+                    "timestamp": int(start_ms + offset_ms),
+                    "payload": event["payload"],
+                    "attribute_id": event["sensor_type"],
+                }
+            )
+            send_at_ms = offset_ms
+            offset_ms += event["delay"]
+
+        # Sleep until the last sample's capture time (simulates real sensor timing)
+        # But actual transmission is controlled by backpressure batching
+        await asyncio.sleep(max(0.0, start + send_at_ms / 1000 - loop.time()))
 
+        try:
             if use_backpressure:
                 # Use backpressure-aware push - batches messages according to server config
-                await client.push_with_backpressure(channel, "measurement", payload)
-            else:
+                for payload in rows:
+                    await client.push_with_backpressure(channel, "measurement", payload)
+            elif len(rows) == 1:
                 # Legacy: immediate push
-                await client.push(channel, "measurement", payload)
+                await client.push(channel, "measurement", rows[0])
+            else:
+                await client.push(channel, "measurements_batch", rows)
 
         except Exception as e:
             logging.error(f"Error pushing message: {e}")
             return
 
-        # Still sleep between generating samples (simulates real sensor timing)
-        # But actual transmission is controlled by backpressure batching
-        await asyncio.sleep(event["delay"] / 1000)
+    # Wait out the last sample's delay so the next cycle starts on schedule
+    await asyncio.sleep(max(0.0, start + offset_ms / 1000 - loop.time()))
 
 
 def handle_message(topic, event, payload):
@@ -214,7 +269,7 @@ def handle_message(topic, event, payload):
         )
 
 
-async def send_sensor_data(
+def send_sensor_data(
     client,
     sensor_id,
     sensor_type,
@@ -225,10 +280,13 @@ async def send_sensor_data(
     scr_number=None,
     burst_number=None,
 ):
-    """Generates and sends data for a given sensor type."""
+    """Generates the events to stream for a given sensor type.
+
+    Synchronous and CPU-bound, so the phoenix loop runs it on a worker thread.
+    """
     events = []
     # Generate the synthetic data based on sensor_type
-    data = generate_sensor_data(
+    timestamps, payloads = generate_sensor_data(
         duration,
         sampling_rate,
         sensor_type,
@@ -237,44 +295,48 @@ async def send_sensor_data(
         scr_number,
         burst_number,
     )
+    # tolist() yields plain ints/floats in one call instead of boxing NumPy scalars
+    samples = zip(timestamps.tolist(), payloads.tolist())
 
     if sensor_type == "heartrate":
-        hr = data
+        # Keep samples that moved more than 1 bpm from the last kept one. That depends
+        # on the previous selection, so it is a loop; only the delays are vectorized.
+        kept = []
         last_hr = None
-        last_send_time = 0  # initialize before the loop
-        for point in hr:
-            if last_hr is None or abs(point["payload"] - last_hr) > 1:
-                current_time = time.time()
-                delay = random.uniform(900, 2100)  # slightly randomize the delay
-                events.append(
-                    {
-                        "delay": delay,
-                        "payload": point["payload"],
-                        "timestamp": point["timestamp"],
-                        "sensor_type": sensor_type,
-                    }
-                )
-                last_hr = point["payload"]
-                last_send_time = current_time
+        for timestamp, payload in samples:
+            if last_hr is None or abs(payload - last_hr) > 1:
+                kept.append((timestamp, payload))
+                last_hr = payload
+
+        delays = _RNG.uniform(900, 2100, len(kept)).tolist()  # slightly randomize the delay
+        events = [
+            {
+                "delay": delay,
+                "payload": payload,
+                "timestamp": timestamp,
+                "sensor_type": sensor_type,
+            }
+            for (timestamp, payload), delay in zip(kept, delays)
+        ]
     else:
         # calculate the time deltas
         delta = 1000 / sampling_rate  # milliseconds
-        dt_list, _ = time_delta(len(data), delta, noise_range_percentage=1)
-        time_deltas = np.array(dt_list)
-        for i, point in enumerate(data):
+        time_deltas, _ = time_delta(len(payloads), delta, noise_range_percentage=1)
+        for i, (timestamp, payload) in enumerate(samples):
             events.append(
                 {
                     "delay": time_deltas[i],
-                    "payload": point["payload"],
-                    "timestamp": point["timestamp"],
+                    "payload": payload,
+                    "timestamp": timestamp,
                     "sensor_type": sensor_type,
                 }
             )
-    print(events)
+    logging.debug("Generated %d %s events", len(events), sensor_type)
     return events
 
 
-async def main():
+def build_parser():
+    """Build the command line parser; also used by sensocto-simulator-concurrent.py."""
     parser = argparse.ArgumentParser(description="Stream sensor data to Phoenix.")
     parser.add_argument(
         "--mode",
@@ -294,6 +356,13 @@ async def main():
         type=str,
         help="The sensor type to simulate (ecg, ppg, rsp, eda, emg, heartrate).",
     )
+    parser.add_argument(
+        "--sensor_types",
+        type=str,
+        default=None,
+        help="Comma-separated sensor types to simulate concurrently, e.g. ecg,ppg,rsp; "
+        "in phoenix mode they share one connection. Overrides --sensor_type.",
+    )
     parser.add_argument(
         "--duration",
         type=int,
@@ -335,8 +404,15 @@ async def main():
         action="store_true",
         help="Disable backpressure support (send immediately)",
     )
+    return parser
+
+
+async def run(args, client=None):
+    """Run one simulated sensor with already parsed arguments.
 
-    args = parser.parse_args()
+    In phoenix mode, pass a connected PhoenixChannelClient as client to stream on
+    that shared socket; otherwise the sensor opens its own connection.
+    """
     use_backpressure = args.backpressure and not args.no_backpressure
     mode = args.mode
     output = args.output
@@ -368,27 +444,41 @@ async def main():
             "attributes": [sensor_type],
         }
 
-        client = PhoenixChannelClient(socket_url, handle_message)
-        logging.info(f"Connecting to: {socket_url}")
+        shared_client = client is not None
+        if not shared_client:
+            client = PhoenixChannelClient(socket_url, handle_message)
+            logging.info(f"Connecting to: {socket_url}")
 
         # Use the correct channel topic format for SensorDataChannel
         channel = f"sensocto:sensor:{sensor_id_string}"
         await client.subscribe(channel, join_params)
-        await client.connect()
+        if not shared_client:
+            await client.connect()
+
+        def generate_cycle():
+            # Signal generation runs on a worker thread so it neither blocks the event
+            # loop (and other in-process sensors) nor waits for the previous cycle
+            return asyncio.create_task(
+                asyncio.to_thread(
+                    send_sensor_data,
+                    client,
+                    sensor_id_string,
+                    sensor_type,
+                    duration,
+                    sampling_rate,
+                    heart_rate,
+                    respiratory_rate,
+                    scr_number,
+                    burst_number,
+                )
+            )
 
+        next_events = generate_cycle()
         while True:  # Loop indefinitely
             logging.info(f"Start streaming {sensor_type} data")
-            events = await send_sensor_data(
-                client,
-                sensor_id_string,
-                sensor_type,
-                duration,
-                sampling_rate,
-                heart_rate,
-                respiratory_rate,
-                scr_number,
-                burst_number,
-            )
+            events = await next_events
+            # Generate the following cycle while this one streams; at most one is buffered
+            next_events = generate_cycle()
 
             logging.info(f"About to stream {len(events)} events to channel {channel} (backpressure={'on' if use_backpressure else 'off'})...")
             await stream_sensor_data(client, sensor_id, events, channel, use_backpressure=use_backpressure)
@@ -396,7 +486,7 @@ async def main():
 
     elif mode == "csv":
         try:
-            data = generate_sensor_data(
+            timestamps, payloads = generate_sensor_data(
                 duration,
                 sampling_rate,
                 sensor_type,
@@ -416,36 +506,70 @@ async def main():
             else:
                 headers = ["timestamp", "payload"]
 
-            f = None
-
-            if output == "file":
-                f = open(f"{sensor_type}_data.csv", "w")
-
             # with open(f"{sensor_type}_data.csv", 'w', newline='') as csvfile:
             #    print(csv.list_dialects())
             #    #writer = csv.writer(csvfile, delimiter=',', dialect='unix') # quotechar='|', quoting=csv.QUOTE_MINIMAL
 
-            last_timestamp = None
-            for row in data:
-                if not last_timestamp is None:
-                    delay = (int(row["timestamp"]) - int(last_timestamp)) / 1000
-                else:
-                    delay = 0
-
-                row_str = "{},{},{}".format(row["timestamp"], delay, row["payload"])
-                # print(row_str)
-                # writer.writerow(row_str)
-                last_timestamp = int(row["timestamp"])
-
-                if output == "file":
-                    f.write("{}\n".format(row_str))
-                else:
-                    print(row_str)
-                # print(row_str)
+            # Hand rows to the stream in blocks instead of one write()/print() per row
+            if output == "file":
+                with open(f"{sensor_type}_data.csv", "w", buffering=CSV_BUFFER_SIZE) as f:
+                    write_csv_rows(f, timestamps, payloads)
                 # print(f"Data for {sensor_type} saved in {sensor_type}_data.csv")
+            else:
+                write_csv_rows(sys.stdout, timestamps, payloads)
+                sys.stdout.flush()
         except BrokenPipeError:
             print("Broken Pipe Error")
 
 
+def write_csv_rows(stream, timestamps, payloads):
+    """Writes timestamp,delay,payload rows to stream in blocks of CSV_WRITE_CHUNK.
+
+    Only one block of formatted lines exists at a time, so memory does not grow
+    with the duration of the recording.
+    """
+    # Seconds since the previous row, computed for all rows at once
+    delays = np.diff(timestamps, prepend=timestamps[:1]) / 1000
+    for start in range(0, len(timestamps), CSV_WRITE_CHUNK):
+        stop = start + CSV_WRITE_CHUNK
+        block_delays = delays[start:stop].tolist()
+        if start == 0:
+            block_delays[0] = 0
+        stream.writelines(
+            f"{timestamp},{delay},{payload}\n"
+            for timestamp, delay, payload in zip(
+                timestamps[start:stop].tolist(), block_delays, payloads[start:stop].tolist()
+            )
+        )
+
+
+async def run_sensor_types(args, client=None):
+    """Run the --sensor_types of one simulated sensor concurrently.
+
+    In phoenix mode all of them stream over a single connection: client when one
+    is passed, as for run(), otherwise a connection opened here.
+    """
+    sensor_types = [t.strip() for t in args.sensor_types.split(",") if t.strip()]
+    if args.mode == "phoenix" and client is None:
+        client = PhoenixChannelClient(args.socket_url, handle_message)
+        logging.info(f"Connecting to: {args.socket_url}")
+        await client.connect()
+
+    await asyncio.gather(
+        *(
+            run(argparse.Namespace(**{**vars(args), "sensor_type": sensor_type}), client)
+            for sensor_type in sensor_types
+        )
+    )
+
+
+async def main():
+    args = build_parser().parse_args()
+    if args.sensor_types:
+        await run_sensor_types(args)
+    else:
+        await run(args)
+
+
 if __name__ == "__main__":
-    asyncio.run(main())
+    run_loop(main())
@@ -1,94 +1,122 @@
 # stream_ecg.py
 import neurokit2 as nk
 import numpy as np
-import pandas as pd
 import asyncio
 import logging
 
 from numpy.lib.recfunctions import join_by
 
-from python_phoenix_client import PhoenixChannelClient
+from python_phoenix_client import PhoenixChannelClient, dumps, run
 import requests
 import time
 import argparse
-import random
 import uuid
 
 logging.basicConfig(level=logging.INFO)  # Set Logging Level
 save_path = "/home/jovyan"
 
+# Shared PCG64 generator; faster than the legacy global np.random state
+_RNG = np.random.default_rng()
+
+
+def _add_sine(out, phase, frequency, amplitude, scratch):
+    """Adds amplitude * sin(frequency * phase) to out in place, using scratch for the sine."""
+    np.multiply(phase, frequency, out=scratch)
+    np.sin(scratch, out=scratch)
+    scratch *= amplitude
+    out += scratch
+
 
 def generate_heart_rate(duration, sampling_rate, avg_heart_rate=70, variability=3, tidal_amplitude=50):
     """Generates heart rate data with a tidal trend, sinusoidal variation, and random noise."""
     num_samples = int(duration * sampling_rate)
-    time_points = np.linspace(0, duration, num_samples)
+    # Accumulate in place into one array instead of allocating a temporary per term
+    phase = np.linspace(0, duration, num_samples) * (2 * np.pi)
+    scratch = np.empty_like(phase)
+
+    # Random noise around the average
+    heart_rate_values = _RNG.standard_normal(num_samples)
+    heart_rate_values *= variability / 3
+    heart_rate_values += avg_heart_rate
 
     # Tidal trend (slow sinusoidal variation)
-    tidal_trend = np.sin(2 * np.pi * 0.01 * time_points) * tidal_amplitude
+    _add_sine(heart_rate_values, phase, 0.01, tidal_amplitude, scratch)
 
     # Sinusoidal variation
-    sinusoid = np.sin(2 * np.pi * 0.1 * time_points) * variability
-
-    # Random noise
-    noise = np.random.normal(0, variability / 3, num_samples)
+    _add_sine(heart_rate_values, phase, 0.1, variability, scratch)
 
-    heart_rate_values = avg_heart_rate + tidal_trend + sinusoid + noise
-    heart_rate_values = np.clip(heart_rate_values, 30, 220)  # Clip to a reasonable range
+    np.clip(heart_rate_values, 30, 220, out=heart_rate_values)  # Clip to a reasonable range
     return heart_rate_values
 
 
 def generate_sensor_data(duration, sampling_rate, sensor_type, heart_rate=None, respiratory_rate=None, scr_number=None,
                          burst_number=None):
-    """Generates synthetic biosignal data based on sensor_type."""
+    """Generates synthetic biosignal data based on sensor_type, as a NumPy array."""
     if sensor_type == "ecg":
         ecg = nk.ecg_simulate(duration=duration, sampling_rate=sampling_rate,
                               heart_rate=heart_rate if heart_rate else 70)
-        return pd.DataFrame({"ECG": ecg})
+        return np.asarray(ecg)
     elif sensor_type == "ppg":
         ppg = nk.ppg_simulate(duration=duration, sampling_rate=sampling_rate,
                               heart_rate=heart_rate if heart_rate else 70)
-        return pd.DataFrame({"PPG": ppg})
+        return np.asarray(ppg)
     elif sensor_type == "rsp":
         rsp = nk.rsp_simulate(duration=duration, sampling_rate=sampling_rate,
                               respiratory_rate=respiratory_rate if respiratory_rate else 15)
-        return pd.DataFrame({"RSP": rsp})
+        return np.asarray(rsp)
     elif sensor_type == "eda":
         eda = nk.eda_simulate(duration=duration, sampling_rate=sampling_rate,
                               scr_number=scr_number if scr_number else 5)
-        return pd.DataFrame({"EDA": eda})
+        return np.asarray(eda)
     elif sensor_type == "emg":
         emg = nk.emg_simulate(duration=duration, sampling_rate=sampling_rate,
                               burst_number=burst_number if burst_number else 5)
-        return pd.DataFrame({"EMG": emg})
+        return np.asarray(emg)
     elif sensor_type == "heartrate":
         hr_values = generate_heart_rate(duration, sampling_rate, heart_rate if heart_rate else 70)
-        return pd.DataFrame({"HeartRate": hr_values})
+        return hr_values
     else:
         raise ValueError(f"Unsupported sensor type: {sensor_type}")
 
 
 def time_delta(samples, delta, noise_range_percentage=1):
-    dt_list = [delta] * samples
-    noise_number = (delta) / 100 * noise_range_percentage
-    noise_range = (-noise_number, noise_number)
-    dt_list_noisy = [x + np.random.uniform(*noise_range) for x in dt_list]
+    """Returns constant and jittered (+/- noise_range_percentage) sample intervals as arrays."""
+    noise_number = delta / 100 * noise_range_percentage
+    dt_list = np.full(samples, delta, dtype=np.float64)
+    dt_list_noisy = _RNG.uniform(
+        delta - noise_number, delta + noise_number, size=samples
+    )
     return dt_list, dt_list_noisy
 
 
 async def stream_sensor_data(client, sensor_id, events):
+    topic = f"sensor_data:{sensor_id}"
+    # Read the clock once; each sample is stamped at its offset on the simulated timeline
+    # and sleeps until that offset, so send time does not accumulate as drift
+    loop = asyncio.get_running_loop()
+    start = loop.time()
+    timestamp_ms = time.time_ns() // 1_000_000
+    offset_ms = 0.0
+    uuids = {}  # encoded '"uuid":...' field per sensor type
+    debug = logging.getLogger().isEnabledFor(logging.DEBUG)
     for event in events:
-        payload = {
-            'timestamp': int(time.time() * 1000),
-            'payload': event['payload'],
-            'uuid': event['sensor_type']
-        }
-        print(payload)
+        uuid_field = uuids.get(event['sensor_type'])
+        if uuid_field is None:
+            uuid_field = uuids[event['sensor_type']] = f'"uuid":{dumps(event["sensor_type"])}'
+        # Encode the measurement once here; push_raw sends it as is
+        payload = (
+            f'{{"timestamp":{timestamp_ms + int(offset_ms)},'
+            f'"payload":{dumps(event["payload"])},{uuid_field}}}'
+        )
+        if debug:
+            logging.debug("%s", payload)
         try:
-            await client.push(f"sensor_data:{sensor_id}", "measurement", payload)
+            await client.push_raw(topic, "measurement", payload)
         except Exception as e:
             logging.error(f"Error pushing message: {e}")
             return
-        await asyncio.sleep(event['delay'])
+        offset_ms += event['delay'] * 1000
+        await asyncio.sleep(max(0.0, start + offset_ms / 1000 - loop.time()))
 
 
 def handle_message(topic, event, payload):
@@ -101,29 +129,34 @@ async def send_sensor_data(client, sensor_id, sensor_type, duration, sampling_ra
     """Generates and sends data for a given sensor type."""
     events = []
     # Generate the synthetic data based on sensor_type
-    data_df = generate_sensor_data(duration, sampling_rate, sensor_type, heart_rate, respiratory_rate, scr_number,
-                                   burst_number)
+    data = generate_sensor_data(duration, sampling_rate, sensor_type, heart_rate, respiratory_rate, scr_number,
+                                burst_number)
 
     if sensor_type == "heartrate":
-        hr = data_df["HeartRate"].tolist()
+        hr = np.rint(data).astype(np.int64)  # round the data
+        # A repeat of the previous sample can never be kept, so drop runs up front;
+        # keeping a sample depends on the last kept one, so the rest stays a loop
+        if len(hr):
+            hr = hr[np.concatenate(([True], hr[1:] != hr[:-1]))]
+        kept = []
         last_hr = None
-        last_send_time = 0  # initialize before the loop
-        for i, point in enumerate(hr):
-            point = round(point)  # round the data
+        for point in hr.tolist():
             if last_hr is None or abs(point - last_hr) > 1:
-                current_time = time.time()
-                delay = random.uniform(0.9, 2.1)  # slightly randomize the delay
-                events.append({'delay': delay, 'payload': point, 'sensor_type': sensor_type})
+                kept.append(point)
                 last_hr = point
-                last_send_time = current_time
+
+        delays = _RNG.uniform(0.9, 2.1, len(kept)).tolist()  # slightly randomize the delay
+        events = [
+            {'delay': delay, 'payload': point, 'sensor_type': sensor_type}
+            for point, delay in zip(kept, delays)
+        ]
 
 
     else:
-        signal = data_df[data_df.columns[0]].tolist()  # get the signal column as a list
+        signal = data.tolist()
         # calculate the time deltas
         delta = 1000 / sampling_rate  # milliseconds
-        dt_list, _ = time_delta(len(signal), delta, noise_range_percentage=1)
-        time_deltas = np.array(dt_list)
+        time_deltas, _ = time_delta(len(signal), delta, noise_range_percentage=1)
         for i, point in enumerate(signal):
             events.append({'delay': time_deltas[i] / 1000, 'payload': point, 'sensor_type': sensor_type})
 
@@ -190,4 +223,4 @@ async def main():
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    run(main())
@@ -0,0 +1,65 @@
+"""Tests for running simulator config lines in-process in sensocto-simulator-concurrent.py."""
+
+import asyncio
+import importlib.util
+import os
+import sys
+
+SIMULATOR_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SOCKET_URL = "ws://localhost:4000/socket/websocket"
+
+sys.path.insert(0, SIMULATOR_DIR)
+
+
+def load_runner():
+    path = os.path.join(SIMULATOR_DIR, "sensocto-simulator-concurrent.py")
+    spec = importlib.util.spec_from_file_location("sensocto_simulator_concurrent", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+runner = load_runner()
+
+
+def run_config_line(monkeypatch, line):
+    """Runs one config line against a stubbed simulator run() and a shared client.
+
+    Returns the shared client and the (sensor_type, sensor_id, client) of each run.
+    """
+    simulator = runner.load_simulator()
+    calls = []
+
+    async def fake_run(args, client=None):
+        calls.append((args.sensor_type, args.sensor_id, client))
+
+    monkeypatch.setattr(simulator, "run", fake_run)
+    client = object()
+
+    async def main():
+        connected = asyncio.get_running_loop().create_future()
+        connected.set_result(client)
+        await runner.run_simulator(runner.simulator_argv(line), {SOCKET_URL: connected})
+
+    asyncio.run(main())
+    return client, calls
+
+
+def test_sensor_types_line_runs_every_type_on_the_shared_client(monkeypatch):
+    client, calls = run_config_line(
+        monkeypatch,
+        f"python3 sensocto-simulator.py --mode phoenix --sensor_id Sim1 "
+        f"--sensor_types ecg,ppg,rsp --socket_url {SOCKET_URL}",
+    )
+
+    assert calls == [("ecg", "Sim1", client), ("ppg", "Sim1", client), ("rsp", "Sim1", client)]
+
+
+def test_sensor_type_line_runs_one_sensor(monkeypatch):
+    client, calls = run_config_line(
+        monkeypatch,
+        f"python3 sensocto-simulator.py --mode phoenix --sensor_id Sim1 "
+        f"--sensor_type ecg --socket_url {SOCKET_URL}",
+    )
+
+    assert calls == [("ecg", "Sim1", client)]